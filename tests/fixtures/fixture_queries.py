@@ -0,0 +1,20 @@
+import pytest
+from django.urls import resolve
+
+from core.queries import QueryRecorder, check_budget
+
+
+@pytest.fixture
+def assert_query_budget(settings):
+    """Запрашивает адрес и проверяет бюджет SQL-запросов его view."""
+    settings.QUERY_BUDGET_RAISE = False
+
+    def check(client, url):
+        with QueryRecorder() as recorder:
+            response = client.get(url)
+        view_name = resolve(url).view_name
+        problems = check_budget(recorder, view_name)
+        assert not problems, '\n'.join(problems)
+        return response, recorder
+
+    return check
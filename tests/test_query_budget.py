@@ -0,0 +1,51 @@
+import pytest
+from django.urls import reverse
+
+from posts.models import Comment, Follow
+from posts.urls import urlpatterns
+
+
+def url_kwargs(post, another_user):
+    post_id = {'post_id': post.pk}
+    username = {'username': another_user.username}
+    return {
+        'index': {},
+        'trending': {},
+        'group_list': {'slug': post.group.slug},
+        'profile': {'username': post.author.username},
+        'post_detail': post_id,
+        'post_create': {},
+        'post_edit': post_id,
+        'comment_list': post_id,
+        'add_comment': post_id,
+        'follow_index': {},
+        'profile_follow': username,
+        'profile_unfollow': username,
+    }
+
+
+class TestQueryBudget:
+
+    @pytest.fixture
+    def data(self, mixer, user, another_user, group):
+        # Без картинок: запросы sorl-thumbnail к хранилищу миниатюр
+        # зависят от файлов, а не от view
+        mixer.cycle(20).blend('posts.Post', author=user, group=group, image='')
+        mixer.cycle(20).blend('posts.Post', author=another_user, group=group, image='')
+        post = user.posts.first()
+        commenters = mixer.cycle(5).blend('auth.User')
+        for commenter in commenters:
+            Comment.objects.create(post=post, author=commenter, text='Текст')
+        Follow.objects.create(user=user, author=another_user)
+        return url_kwargs(post, another_user)
+
+    @pytest.mark.django_db
+    @pytest.mark.parametrize('name', [pattern.name for pattern in urlpatterns])
+    def test_view_fits_query_budget(self, name, data, user_client, assert_query_budget):
+        assert name in data, (
+            f'Добавьте аргументы адреса `posts:{name}` в `url_kwargs`, '
+            f'чтобы проверить его бюджет SQL-запросов'
+        )
+        url = reverse(f'posts:{name}', kwargs=data[name])
+        response, recorder = assert_query_budget(user_client, url)
+        assert response.status_code in (200, 302)
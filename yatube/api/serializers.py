@@ -0,0 +1,90 @@
+"""Описание полей JSON-ответов API.
+
+Для каждого поля указаны колонки, которые нужно выбрать из БД, и функция
+получения значения. По параметру ``fields=`` queryset выбирает только
+нужные колонки через ``only()`` и ``select_related()``.
+"""
+
+POST_FIELDS = {
+    'id': ((), lambda post: post.pk),
+    'titul': (('titul',), lambda post: post.titul),
+    'text': (('text',), lambda post: post.text),
+    'pub_date': (('pub_date',), lambda post: post.pub_date),
+    'author': (
+        ('author', 'author__username'),
+        lambda post: post.author.username,
+    ),
+    'group': (
+        ('group', 'group__slug'),
+        lambda post: post.group.slug if post.group_id else None,
+    ),
+    'image': (
+        ('image',),
+        lambda post: post.image.url if post.image else None,
+    ),
+    'comments_count': (
+        ('comments_count',),
+        lambda post: post.comments_count,
+    ),
+}
+
+GROUP_FIELDS = {
+    'id': ((), lambda group: group.pk),
+    'title': (('title',), lambda group: group.title),
+    'slug': (('slug',), lambda group: group.slug),
+    'description': (('description',), lambda group: group.description),
+}
+
+COMMENT_FIELDS = {
+    'id': ((), lambda comment: comment.pk),
+    'post': (('post',), lambda comment: comment.post_id),
+    'author': (
+        ('author', 'author__username'),
+        lambda comment: comment.author.username,
+    ),
+    'text': (('text',), lambda comment: comment.text),
+    'created': (('created',), lambda comment: comment.created),
+}
+
+FOLLOW_FIELDS = {
+    'id': ((), lambda follow: follow.pk),
+    'user': (
+        ('user', 'user__username'),
+        lambda follow: follow.user.username,
+    ),
+    'author': (
+        ('author', 'author__username'),
+        lambda follow: follow.author.username,
+    ),
+}
+
+
+def parse_fields(request, spec):
+    """Поля из ``?fields=a,b``; ValueError для неизвестных полей."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(spec)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(fields) - set(spec)
+    if unknown:
+        raise ValueError(
+            'Неизвестные поля: {}'.format(', '.join(sorted(unknown))))
+    return fields
+
+
+def tune(queryset, spec, fields, extra=()):
+    """Выбирает из БД только колонки запрошенных полей."""
+    columns = set(extra)
+    for name in fields:
+        columns.update(spec[name][0])
+    related = {
+        column.split('__')[0] for column in columns if '__' in column}
+    if related:
+        queryset = queryset.select_related(*related)
+    else:
+        queryset = queryset.select_related(None)
+    return queryset.only(*columns)
+
+
+def serialize(obj, spec, fields):
+    return {name: spec[name][1](obj) for name in fields}
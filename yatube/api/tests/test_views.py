@@ -0,0 +1,132 @@
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+POSTS = 'api:posts'
+POST = 'api:post'
+COMMENTS = 'api:comments'
+FOLLOWS = 'api:follows'
+POSTS_COUNT = 5
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}')
+            for i in range(POSTS_COUNT)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def send(self, method, url, data):
+        return getattr(self.authorized_client, method)(
+            url, json.dumps(data), content_type='application/json')
+
+    def test_posts_cursor_pagination(self):
+        """Список постов листается по ссылкам next."""
+        url = reverse(POSTS) + '?limit=2'
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids += [post['id'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(ids, [post.pk for post in reversed(self.posts)])
+
+    def test_sparse_fields_select_only_needed_columns(self):
+        """fields= ограничивает и ответ, и выбираемые колонки."""
+        response = self.client.get(
+            reverse(POSTS), {'fields': 'id,author', 'limit': 1})
+        self.assertEqual(
+            response.json()['results'],
+            [{'id': self.posts[-1].pk, 'author': 'author'}])
+        response = self.client.get(reverse(POSTS), {'fields': 'secret'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_unchanged_list_returns_not_modified(self):
+        """Повторный запрос с ETag получает 304, пока нет новых постов."""
+        response = self.client.get(reverse(POSTS))
+        etag = response['ETag']
+        response = self.client.get(reverse(POSTS), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(author=self.author, text='Новый')
+        response = self.client.get(reverse(POSTS), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_new_comment_changes_etags(self):
+        """Число комментариев в ответе меняет ETag поста и списка."""
+        post = self.posts[0]
+        urls = [reverse(POST, args=[post.pk]), reverse(POSTS)]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Comment.objects.create(post=post, author=self.user, text='Новый')
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        # Список без числа комментариев от них не зависит
+        url = reverse(POSTS) + '?fields=id'
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(post=post, author=self.user, text='Ещё')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_create_and_edit_post(self):
+        """Пост создаёт авторизованный, меняет только автор."""
+        response = self.client.post(reverse(POSTS), {'text': 'Гость'})
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+        response = self.send('post', reverse(POSTS), {
+            'titul': 'Заголовок', 'text': 'Текст', 'group': 'group'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        created = response.json()
+        self.assertEqual(created['group'], 'group')
+        self.assertEqual(created['author'], 'user')
+
+        url = reverse(POST, kwargs={'post_id': created['id']})
+        response = self.send('patch', url, {'text': 'Исправлено'})
+        self.assertEqual(response.json()['text'], 'Исправлено')
+        self.assertEqual(response.json()['titul'], 'Заголовок')
+
+        other = reverse(POST, kwargs={'post_id': self.posts[0].pk})
+        response = self.send('patch', other, {'text': 'Чужое'})
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+        response = self.authorized_client.delete(url)
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Post.objects.filter(pk=created['id']).exists())
+
+    def test_comments(self):
+        """Комментарии поста читаются и создаются."""
+        url = reverse(COMMENTS, kwargs={'post_id': self.posts[0].pk})
+        response = self.send('post', url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTrue(Comment.objects.filter(text='Комментарий').exists())
+        results = self.client.get(url).json()['results']
+        self.assertEqual([item['text'] for item in results], ['Комментарий'])
+
+    def test_follow_and_unfollow(self):
+        """Подписка и отписка через API."""
+        response = self.send('post', reverse(FOLLOWS), {'author': 'author'})
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        results = self.authorized_client.get(reverse(FOLLOWS)).json()
+        self.assertEqual(results['results'][0]['author'], 'author')
+        response = self.authorized_client.delete(
+            reverse('api:unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,276 @@
+"""JSON API для мобильных клиентов.
+
+Списки листаются курсором (``?cursor=``, ``?limit=``), параметр
+``?fields=`` оставляет в ответе и в SQL только нужные поля. GET-ответы
+снабжены ETag из поколений кэша (см. core.cache): неизменившийся список
+отдаёт 304 без запроса к БД. Запись - для авторизованных по сессии,
+с обычной CSRF-защитой (токен из cookie ``csrftoken`` в X-CSRFToken).
+"""
+import json
+from functools import wraps
+
+from core.cache import generation_etag
+from core.paginator import CursorPaginator
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_http_methods
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+
+from .serializers import (COMMENT_FIELDS, FOLLOW_FIELDS, GROUP_FIELDS,
+                          POST_FIELDS, parse_fields, serialize, tune)
+
+
+def error(message, status=400, **extra):
+    return JsonResponse({'detail': message, **extra}, status=status)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Требуется авторизация', status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def read_payload(request):
+    """Данные запроса: JSON-тело или поля формы."""
+    if request.content_type == 'application/json':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ValueError('Некорректный JSON')
+        if not isinstance(payload, dict):
+            raise ValueError('Ожидается JSON-объект')
+        return payload
+    return request.POST.dict()
+
+
+def paginate(request, queryset, spec, field, lookups=None):
+    try:
+        fields = parse_fields(request, spec)
+        limit = min(
+            int(request.GET.get('limit', settings.API_PAGE_SIZE)),
+            settings.API_MAX_PAGE_SIZE)
+    except ValueError as exc:
+        return error(str(exc))
+    if limit < 1:
+        return error('limit должен быть положительным')
+    keys = lookups or (field,)
+    queryset = tune(queryset, spec, fields, extra=[
+        key for key in keys if key != 'pk'])
+    page = CursorPaginator(
+        queryset, limit, field=field, lookups=lookups,
+    ).get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [serialize(obj, spec, fields) for obj in page],
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    })
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(
+        '{}?{}'.format(request.path, params.urlencode()))
+
+
+def detail(request, obj, spec, status=200):
+    try:
+        fields = parse_fields(request, spec)
+    except ValueError as exc:
+        return error(str(exc))
+    return JsonResponse(serialize(obj, spec, fields), status=status)
+
+
+def post_scopes(request):
+    scopes = ['meta']
+    if request.GET.get('group'):
+        scopes.append('group:{}'.format(request.GET['group']))
+    elif request.GET.get('author'):
+        scopes.append('author:{}'.format(request.GET['author']))
+    else:
+        scopes.append('posts')
+    try:
+        fields = parse_fields(request, POST_FIELDS)
+    except ValueError:
+        # На неизвестные поля view ответит 400
+        fields = ()
+    if 'comments_count' in fields:
+        # Комментарии не сбрасывают поколения постов
+        scopes.append('comment_counts')
+    return scopes
+
+
+@condition(etag_func=generation_etag(post_scopes))
+def list_posts(request):
+    posts = Post.objects.all()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return paginate(request, posts, POST_FIELDS, 'pub_date')
+
+
+def save_post(request, form, status=200):
+    if not form.is_valid():
+        return error('Некорректные данные', errors=form.errors)
+    post = form.save(commit=False)
+    if post.author_id is None:
+        post.author = request.user
+    post.save()
+    return detail(request, post, POST_FIELDS, status=status)
+
+
+def post_form_data(request, post=None):
+    """Данные для PostForm: группа передаётся slug-ом, PATCH дополняет."""
+    payload = read_payload(request)
+    data = {}
+    if post is not None and request.method == 'PATCH':
+        data = {
+            'titul': post.titul,
+            'text': post.text,
+            'group': post.group.slug if post.group_id else None,
+        }
+    data.update(payload)
+    slug = data.get('group')
+    if slug:
+        group = Group.objects.filter(slug=slug).first()
+        if group is None:
+            raise ValueError(f'Группа {slug} не найдена')
+        data['group'] = group.pk
+    return data
+
+
+@api_login_required
+def create_post(request):
+    try:
+        data = post_form_data(request)
+    except ValueError as exc:
+        return error(str(exc))
+    form = PostForm(data, files=request.FILES or None)
+    return save_post(request, form, status=201)
+
+
+@require_http_methods(['GET', 'HEAD', 'POST'])
+def posts(request):
+    if request.method == 'POST':
+        return create_post(request)
+    return list_posts(request)
+
+
+@condition(etag_func=generation_etag(
+    lambda request, post_id: ['posts', 'meta', f'comments:{post_id}']))
+def read_post(request, post_id):
+    post = get_object_or_404(Post.objects.select_related('author', 'group'),
+                             pk=post_id)
+    return detail(request, post, POST_FIELDS)
+
+
+@api_login_required
+def change_post(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    if post.author_id != request.user.pk:
+        return error('Изменять пост может только автор', status=403)
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=204)
+    try:
+        data = post_form_data(request, post)
+    except ValueError as exc:
+        return error(str(exc))
+    return save_post(request, PostForm(data, instance=post))
+
+
+@require_http_methods(['GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'])
+def post(request, post_id):
+    if request.method in ('GET', 'HEAD'):
+        return read_post(request, post_id)
+    return change_post(request, post_id)
+
+
+@require_http_methods(['GET', 'HEAD'])
+@condition(etag_func=generation_etag(lambda request: ['meta']))
+def groups(request):
+    return paginate(request, Group.objects.all(), GROUP_FIELDS, 'id')
+
+
+@require_http_methods(['GET', 'HEAD'])
+@condition(etag_func=generation_etag(lambda request, slug: ['meta']))
+def group(request, slug):
+    return detail(request, get_object_or_404(Group, slug=slug), GROUP_FIELDS)
+
+
+@condition(etag_func=generation_etag(
+    lambda request, post_id: [f'comments:{post_id}', 'meta']))
+def list_comments(request, post_id):
+    get_object_or_404(Post, pk=post_id)
+    return paginate(
+        request, Comment.objects.filter(post_id=post_id),
+        COMMENT_FIELDS, 'created')
+
+
+@api_login_required
+def create_comment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    try:
+        form = CommentForm(read_payload(request))
+    except ValueError as exc:
+        return error(str(exc))
+    if not form.is_valid():
+        return error('Некорректные данные', errors=form.errors)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
+    return detail(request, comment, COMMENT_FIELDS, status=201)
+
+
+@require_http_methods(['GET', 'HEAD', 'POST'])
+def comments(request, post_id):
+    if request.method == 'POST':
+        return create_comment(request, post_id)
+    return list_comments(request, post_id)
+
+
+@condition(etag_func=generation_etag(
+    lambda request: [f'follows:{request.user.pk}', 'meta']))
+def list_follows(request):
+    return paginate(
+        request, Follow.objects.filter(user=request.user),
+        FOLLOW_FIELDS, 'id')
+
+
+def create_follow(request):
+    try:
+        username = read_payload(request).get('author')
+    except ValueError as exc:
+        return error(str(exc))
+    author = get_object_or_404(User, username=username)
+    if author == request.user:
+        return error('Нельзя подписаться на себя')
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, author=author)
+    return detail(
+        request, follow, FOLLOW_FIELDS, status=201 if created else 200)
+
+
+@require_http_methods(['GET', 'HEAD', 'POST'])
+@api_login_required
+def follows(request):
+    if request.method == 'POST':
+        return create_follow(request)
+    return list_follows(request)
+
+
+@require_http_methods(['DELETE'])
+@api_login_required
+def unfollow(request, username):
+    get_object_or_404(
+        Follow, user=request.user, author__username=username).delete()
+    return HttpResponse(status=204)
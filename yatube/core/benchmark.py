@@ -0,0 +1,93 @@
+"""Замеры времени ответа view и сравнение с прошлым прогоном.
+
+Результат прогона - JSON с процентилями времени, числом SQL-запросов
+и пиком памяти для каждого view; два таких файла сравниваются
+функцией ``compare``.
+"""
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.db import connection
+
+from .queries import QueryRecorder
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, percent):
+    """Процентиль с линейной интерполяцией между соседними значениями."""
+    values = sorted(values)
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(timings):
+    summary = {
+        f'p{percent}': round(percentile(timings, percent) * 1000, 3)
+        for percent in PERCENTILES
+    }
+    summary['mean'] = round(sum(timings) / len(timings) * 1000, 3)
+    return summary
+
+
+def time_request(client, url):
+    """Время ответа в секундах, число запросов и код ответа."""
+    with QueryRecorder() as recorder:
+        start = time.perf_counter()
+        response = client.get(url)
+        elapsed = time.perf_counter() - start
+    return elapsed, recorder.count, response.status_code
+
+
+def peak_memory(client, url):
+    """Пик памяти Python за один запрос, в КиБ."""
+    tracemalloc.start()
+    try:
+        client.get(url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def compare(current, baseline, threshold):
+    """Регрессии: p95 вырос больше чем на ``threshold`` или стало
+    больше SQL-запросов."""
+    regressions = []
+    for name, result in current['views'].items():
+        before = baseline['views'].get(name)
+        if before is None:
+            continue
+        if result['p95'] > before['p95'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {before["p95"]} -> {result["p95"]} мс')
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f'{name}: SQL-запросов {before["queries"]} -> '
+                f'{result["queries"]}')
+    return regressions
@@ -0,0 +1,235 @@
+"""Кэширование страниц с инвалидацией по поколениям.
+
+Каждой области данных (все посты, группа, автор) соответствует номер
+поколения в кэше. Ключ страницы включает номера поколений её областей,
+поэтому изменение данных сводится к увеличению одного числа: старые
+ключи больше не запрашиваются и вытесняются по TTL.
+
+Дорогие значения (страницы, счётчики) берутся через ``get_or_compute``:
+устаревшее значение пересчитывает один процесс, остальные в это время
+получают прежнее, а не запускают тот же запрос одновременно.
+
+Попадания и промахи страниц считаются в памяти процесса и переносятся
+в кэш не чаще раза в ``PAGE_CACHE_STATS_INTERVAL`` секунд: запись
+в общий кэш на каждом попадании выстроила бы воркеры в очередь.
+"""
+import hashlib
+import math
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import quote_etag
+
+GENERATION_KEY = 'generation:{}'
+PAGE_KEY = 'page:{}'
+LOCK_KEY = 'lock:{}'
+# Как часто ждущий запрос проверяет, не посчитано ли значение, секунды
+LOCK_POLL_INTERVAL = 0.05
+STATS_KEYS = {'hits': 'page_cache:hits', 'misses': 'page_cache:misses'}
+
+_stats_lock = threading.Lock()
+_pending_stats = dict.fromkeys(STATS_KEYS, 0)
+_stats_flushed = time.monotonic()
+
+
+def _fresh_generation():
+    # Номер от времени, а не единица: если ключ поколения вытеснен,
+    # новый номер не совпадёт с уже закэшированными страницами.
+    return int(time.time() * 1000)
+
+
+def get_generations(scopes):
+    """Номера поколений областей одним обращением к кэшу."""
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _fresh_generation() for key in keys if key not in found}
+    for key, value in missing.items():
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_generation(*scopes):
+    """Делает устаревшими все страницы перечисленных областей."""
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_generation(), None)
+
+
+def _record(stat):
+    with _stats_lock:
+        _pending_stats[stat] += 1
+        due = (time.monotonic() - _stats_flushed
+               >= settings.PAGE_CACHE_STATS_INTERVAL)
+    if due:
+        flush_page_cache_stats()
+
+
+def _take_pending_stats():
+    global _stats_flushed
+    with _stats_lock:
+        pending = {stat: count for stat, count in _pending_stats.items()
+                   if count}
+        _pending_stats.update(dict.fromkeys(_pending_stats, 0))
+        _stats_flushed = time.monotonic()
+    return pending
+
+
+def flush_page_cache_stats():
+    """Переносит попадания и промахи этого процесса в кэш."""
+    for stat, count in _take_pending_stats().items():
+        key = STATS_KEYS[stat]
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            cache.set(key, count, None)
+
+
+def page_cache_stats():
+    """Число попаданий и промахов кэша страниц.
+
+    Другие процессы досылают свои счётчики с задержкой до
+    ``PAGE_CACHE_STATS_INTERVAL`` секунд.
+    """
+    flush_page_cache_stats()
+    values = cache.get_many(STATS_KEYS.values())
+    stats = {stat: values.get(key, 0) for stat, key in STATS_KEYS.items()}
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / total if total else 0.0
+    return stats
+
+
+def reset_page_cache_stats():
+    _take_pending_stats()
+    cache.delete_many(STATS_KEYS.values())
+
+
+def _expires_early(expires, cost):
+    # Вероятностное раннее истечение (XFetch): чем ближе срок и дороже
+    # пересчёт, тем вероятнее, что его начнёт один из запросов заранее
+    if expires is None:
+        return False
+    gap = -cost * settings.CACHE_EARLY_BETA * math.log(1 - random.random())
+    return time.time() + gap >= expires
+
+
+def _wait_for(key, version):
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None and entry[1] == version:
+            return entry
+    return None
+
+
+def get_or_compute(key, compute, timeout, version=None, cacheable=None):
+    """Значение ``key`` из кэша или результат ``compute()``.
+
+    Значение устаревает через ``timeout`` секунд, при смене ``version``
+    (например, поколений областей) или чуть раньше срока с вероятностью,
+    растущей к его концу. Пересчитывает устаревшее значение один запрос -
+    тот, кто взял блокировку. Значение той же версии, у которого только
+    вышел срок, остальные тем временем получают прежним (не дольше
+    ``CACHE_STALE_TIMEOUT`` секунд после срока). Значение другой версии
+    сброшено и не отдаётся: без него запросы до ``CACHE_LOCK_WAIT`` секунд
+    ждут результат, а потом считают сами.
+    ``cacheable(value)`` решает, сохранять ли посчитанное значение.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, entry_version, expires, cost = entry
+        if entry_version == version and not _expires_early(expires, cost):
+            return value
+    lock = LOCK_KEY.format(key)
+    locked = cache.add(lock, 1, settings.CACHE_LOCK_TIMEOUT)
+    if not locked:
+        if entry is not None and entry[1] == version:
+            return entry[0]
+        entry = _wait_for(key, version)
+        if entry is not None:
+            return entry[0]
+        # Считающий запрос не успел: посчитать самим, не дожидаясь
+    try:
+        start = time.monotonic()
+        value = compute()
+        cost = time.monotonic() - start
+        if cacheable is None or cacheable(value):
+            expires = None if timeout is None else time.time() + timeout
+            cache.set(
+                key, (value, version, expires, cost),
+                None if timeout is None
+                else timeout + settings.CACHE_STALE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock)
+    return value
+
+
+def _cacheable_response(response):
+    return response.status_code == 200 and not response.cookies
+
+
+def cache_page_by_generation(scopes):
+    """Кэширует ответ view для анонимных GET-запросов.
+
+    ``scopes(*args, **kwargs)`` получает аргументы view и возвращает
+    области, от которых зависит страница. Страница хранится по адресу,
+    а поколения областей - её версия (см. ``get_or_compute``). ETag
+    ответа строится по версии отданной страницы, как ``generation_etag``
+    с теми же областями: поколение, сменившееся во время запроса,
+    не попадёт в ETag старой страницы.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            computed = False
+
+            def compute():
+                nonlocal computed
+                computed = True
+                return view(request, *args, **kwargs)
+
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            version = get_generations(scopes(*args, **kwargs))
+            response = get_or_compute(
+                PAGE_KEY.format(path), compute, settings.PAGE_CACHE_TIMEOUT,
+                version=version, cacheable=_cacheable_response)
+            _record('misses' if computed else 'hits')
+            if _cacheable_response(response):
+                response['ETag'] = quote_etag(_etag(request, version))
+            return response
+        return wrapper
+    return decorator
+
+
+def generation_etag(scopes):
+    """``etag_func`` для ``condition`` из поколений областей страницы.
+
+    ``scopes(request, *args, **kwargs)`` возвращает области, как
+    в ``cache_page_by_generation``. В ETag входят также путь с параметрами,
+    пользователь и CSRF-cookie: страница с формой не отдаётся по 304
+    с чужим токеном. Проверка стоит одного ``get_many`` к кэшу и ни
+    одного запроса к БД.
+    """
+    def etag_func(request, *args, **kwargs):
+        return _etag(
+            request, get_generations(scopes(request, *args, **kwargs)))
+    return etag_func
+
+
+def _etag(request, generations):
+    raw = '{}|{}|{}|{}'.format(
+        list(generations), request.get_full_path(), request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+    return hashlib.md5(raw.encode()).hexdigest()
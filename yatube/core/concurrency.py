@@ -0,0 +1,69 @@
+"""Одновременное чтение независимых частей страницы.
+
+Django 2.2 не поддерживает асинхронные view, поэтому части страницы
+(список постов, число записей, статус подписки) читаются в пуле потоков.
+У каждого потока своё соединение с БД, и запросы идут параллельно.
+Соединения потоков пула живут между запросами по правилам
+``CONN_MAX_AGE``, как соединения потоков сервера, а их запросы
+попадают в счётчики запроса (``core.queries``).
+Это выгодно на сетевой СУБД. С SQLite один файл, потоки только ждут
+друг друга, поэтому по умолчанию ``CONCURRENT_READS`` выключен
+и функции выполняются по очереди.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from .queries import active_recorders
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.CONCURRENT_READS_WORKERS,
+                thread_name_prefix='reads')
+    return _executor
+
+
+def _run(function, recorders):
+    # Как сервер в начале и конце запроса: закрываются только
+    # испорченные соединения и старше CONN_MAX_AGE
+    close_old_connections()
+    try:
+        with ExitStack() as stack:
+            for recorder in recorders:
+                stack.enter_context(recorder.attached())
+            return function()
+    finally:
+        close_old_connections()
+
+
+def is_enabled():
+    # Другие потоки не видят незафиксированную транзакцию запроса
+    return settings.CONCURRENT_READS and not any(
+        connection.in_atomic_block for connection in connections.all())
+
+
+def fetch(**functions):
+    """Вызывает функции без аргументов, по возможности одновременно.
+
+    Возвращает словарь результатов с теми же именами; исключение
+    любой функции (например, Http404) поднимается в вызывающем потоке.
+    """
+    if len(functions) < 2 or not is_enabled():
+        return {name: function() for name, function in functions.items()}
+    executor = _get_executor()
+    recorders = active_recorders()
+    futures = {
+        name: executor.submit(_run, function, recorders)
+        for name, function in functions.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
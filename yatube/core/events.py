@@ -0,0 +1,160 @@
+"""Внутрипроцессный pub/sub и поток server-sent events поверх ASGI.
+
+Поток SSE - это ASGI-приложение на asyncio, а не view Django. Ожидающее
+соединение занимает корутину и небольшую очередь, а не поток, поэтому
+один воркер держит тысячи открытых соединений.
+
+``hub.publish`` можно вызывать из любого потока, например из сигнала
+в синхронном view: события передаются в цикл событий подписчика через
+``call_soon_threadsafe``. Хаб живёт в памяти процесса. При нескольких
+воркерах каждый получает только события, опубликованные в нём самом.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+
+class Subscription:
+    """Очередь событий одного подписчика в его цикле событий."""
+
+    def __init__(self, hub, channels, loop):
+        self.hub = hub
+        self.channels = channels
+        self.loop = loop
+        self.queue = asyncio.Queue(settings.EVENTS_QUEUE_SIZE)
+
+    def deliver(self, event):
+        if self.queue.full():
+            # Медленный клиент теряет события, а не память сервера
+            return
+        self.queue.put_nowait(event)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Подписки на каналы: ``posts``, ``group:<slug>``, ``author:<id>``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channels):
+        subscription = Subscription(
+            self, set(channels), asyncio.get_running_loop())
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                listeners = self._channels.get(channel)
+                if listeners is None:
+                    continue
+                listeners.discard(subscription)
+                if not listeners:
+                    del self._channels[channel]
+
+    def publish(self, channels, event):
+        """Отправляет событие подписчикам любого из каналов один раз."""
+        with self._lock:
+            targets = set().union(*(
+                self._channels.get(channel, ()) for channel in channels))
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, event)
+            except RuntimeError:
+                # Цикл событий уже закрыт
+                subscription.close()
+
+    def count(self):
+        with self._lock:
+            return len(set().union(*self._channels.values()))
+
+
+hub = Hub()
+
+
+def format_event(event):
+    """Событие в формате text/event-stream."""
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f'id: {event["id"]}')
+    lines.append(f'event: {event.get("type", "message")}')
+    lines.append('data: ' + json.dumps(event.get('data'), ensure_ascii=False))
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def sse_app(resolve_channels):
+    """ASGI-приложение потока событий.
+
+    ``resolve_channels(scope)`` - синхронная функция: по ASGI scope
+    возвращает каналы подписки или None (тогда ответ 403). Она
+    выполняется в пуле потоков, поэтому может обращаться к БД.
+    """
+    async def app(scope, receive, send):
+        loop = asyncio.get_running_loop()
+        channels = await loop.run_in_executor(None, resolve_channels, scope)
+        if channels is None:
+            await send({
+                'type': 'http.response.start', 'status': 403,
+                'headers': [(b'content-type', b'text/plain')],
+            })
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        retry = settings.EVENTS_RETRY_MS
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {retry}\n\n'.encode(),
+            'more_body': True,
+        })
+        subscription = hub.subscribe(channels)
+        disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            while True:
+                getter = asyncio.ensure_future(subscription.queue.get())
+                done, _ = await asyncio.wait(
+                    {getter, disconnected},
+                    timeout=settings.EVENTS_HEARTBEAT,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if getter not in done:
+                    getter.cancel()
+                if disconnected in done:
+                    break
+                # Комментарий-пинг не даёт прокси закрыть тихое соединение
+                body = (
+                    format_event(getter.result()) if getter in done
+                    else b': ping\n\n')
+                await send({
+                    'type': 'http.response.body',
+                    'body': body,
+                    'more_body': True,
+                })
+        finally:
+            subscription.close()
+            disconnected.cancel()
+    return app
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
@@ -0,0 +1,87 @@
+"""Проверка и очистка загружаемых картинок.
+
+``BoundedImageField`` отклоняет файл по размеру ещё до Pillow, а по
+ширине и высоте - читая только заголовок картинки, до декодирования
+пикселей. Так «бомба» в несколько килобайт, распаковывающаяся
+в гигабайты, не декодируется в процессе веб-сервера.
+
+``strip_metadata`` перекодирует картинку без EXIF и прочих метаданных.
+Функция не трогает настройки и модели Django и выполняется
+в отдельном процессе (см. posts.images).
+"""
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+
+class BoundedImageField(forms.ImageField):
+    default_error_messages = {
+        'too_large': 'Файл больше %(limit)s.',
+        'too_many_pixels': (
+            'Картинка слишком большая: %(width)s×%(height)s, '
+            'допустимо не больше %(limit)s мегапикселей.'),
+    }
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return super().to_python(data)
+        if (getattr(data, 'too_large', False)
+                or data.size > settings.UPLOAD_MAX_SIZE):
+            raise forms.ValidationError(
+                self.error_messages['too_large'], code='too_large',
+                params={'limit': filesizeformat(settings.UPLOAD_MAX_SIZE)})
+        self.check_dimensions(data)
+        return super().to_python(data)
+
+    def check_dimensions(self, data):
+        if hasattr(data, 'temporary_file_path'):
+            source = data.temporary_file_path()
+        else:
+            source = data
+        try:
+            # open() читает только заголовок, пиксели не декодируются
+            with Image.open(source) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width = height = None
+        except Exception:
+            # Битый файл отклонит проверка ImageField
+            return
+        finally:
+            if source is data:
+                data.seek(0)
+        limit = settings.UPLOAD_MAX_PIXELS
+        if width is None or width * height > limit:
+            raise forms.ValidationError(
+                self.error_messages['too_many_pixels'],
+                code='too_many_pixels',
+                params={
+                    'width': width or '?', 'height': height or '?',
+                    'limit': round(limit / 1e6, 1),
+                })
+
+
+def strip_metadata(path, max_pixels):
+    """Картинка без метаданных в том же формате; None - оставить как есть.
+
+    Поворот из EXIF применяется к пикселям, остальные теги (камера,
+    координаты съёмки) не сохраняются. Анимации не перекодируются.
+    """
+    with Image.open(path) as image:
+        if image.width * image.height > max_pixels:
+            raise ValueError(f'Слишком много пикселей: {image.size}')
+        if getattr(image, 'is_animated', False):
+            return None
+        image_format = image.format
+        cleaned = ImageOps.exif_transpose(image)
+    options = {}
+    if image_format == 'JPEG':
+        options['quality'] = 90
+        if cleaned.mode not in ('RGB', 'L', 'CMYK'):
+            cleaned = cleaned.convert('RGB')
+    buffer = BytesIO()
+    cleaned.save(buffer, image_format, **options)
+    return buffer.getvalue()
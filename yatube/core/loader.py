@@ -0,0 +1,46 @@
+"""Пакетная загрузка объектов по id через кэш.
+
+Как DataLoader: id собираются со всей страницы, кэш читается одним
+``get_many``, промахи догружаются одним ``in_bulk`` и записываются
+обратно одним ``set_many``. Страница из N объектов стоит два обращения
+к кэшу и не больше одного запроса к БД вместо N отдельных чтений.
+
+Устаревшие объекты удаляются из кэша методом ``forget``, обычно
+в сигналах сохранения.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+LOADER_KEY = 'loader:{}:{}'
+
+
+class CachedLoader:
+    def __init__(self, name, queryset, timeout=None):
+        self.name = name
+        self.queryset = queryset
+        self.timeout = timeout
+
+    def key(self, pk):
+        return LOADER_KEY.format(self.name, pk)
+
+    def load_many(self, ids):
+        """Словарь id -> объект; отсутствующих в БД id в нём нет."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        keys = {self.key(pk): pk for pk in ids}
+        objects = {
+            keys[key]: obj for key, obj in cache.get_many(keys).items()}
+        missing = [pk for pk in ids if pk not in objects]
+        if missing:
+            loaded = self.queryset.all().in_bulk(missing)
+            timeout = self.timeout
+            if timeout is None:
+                timeout = settings.LOADER_TIMEOUT
+            cache.set_many(
+                {self.key(pk): obj for pk, obj in loaded.items()}, timeout)
+            objects.update(loaded)
+        return objects
+
+    def forget(self, *ids):
+        cache.delete_many([self.key(pk) for pk in ids])
@@ -0,0 +1,134 @@
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from core import benchmark
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'filebased': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'core.sqlite_cache.SQLiteCache',
+}
+# Кэш в памяти процесса не виден другим воркерам
+SHARED = {'filebased', 'sqlite'}
+OPERATIONS = ('get', 'get_many', 'set', 'incr')
+COUNTER = 'benchmark:counter'
+
+
+def create_cache(backend, directory, keys):
+    location = (
+        'benchmark' if backend == 'locmem'
+        else os.path.join(directory, backend))
+    return import_string(BACKENDS[backend])(location, {
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': keys * 2},
+    })
+
+
+def run_operation(backend, directory, keys, value_size, operation, count):
+    """Время каждого из ``count`` вызовов операции, в секундах."""
+    cache = create_cache(backend, directory, keys)
+    value = 'x' * value_size
+    names = [f'benchmark:{number}' for number in range(keys)]
+    timings = []
+    for _ in range(count):
+        if operation == 'get':
+            call = (cache.get, random.choice(names))
+        elif operation == 'get_many':
+            call = (cache.get_many, random.sample(names, 20))
+        elif operation == 'set':
+            call = (cache.set, random.choice(names), value)
+        else:
+            call = (cache.incr, COUNTER)
+        start = time.perf_counter()
+        call[0](*call[1:])
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает бэкенды кэша: LocMemCache, FileBasedCache и SQLiteCache '
+        '(get, get_many, set, incr) в одном или нескольких процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend', action='append', dest='backends',
+            choices=sorted(BACKENDS), help='По умолчанию все')
+        parser.add_argument(
+            '--operations', type=int, default=2000,
+            help='Число вызовов каждой операции в каждом процессе')
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Параллельных процессов, как воркеров gunicorn')
+        parser.add_argument('--keys', type=int, default=1000)
+        parser.add_argument('--value-size', type=int, default=1024)
+        parser.add_argument('--output', default=None)
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        results = {}
+        # fork: процессам не нужно заново настраивать Django
+        context = multiprocessing.get_context('fork')
+        for backend in options['backends'] or list(BACKENDS):
+            with tempfile.TemporaryDirectory() as directory:
+                cache = create_cache(backend, directory, options['keys'])
+                cache.clear()
+                cache.set_many({
+                    f'benchmark:{number}': 'x' * options['value_size']
+                    for number in range(options['keys'])
+                })
+                cache.set(COUNTER, 0)
+                results[backend] = {}
+                for operation in OPERATIONS:
+                    arguments = [(
+                        backend, directory, options['keys'],
+                        options['value_size'], operation,
+                        options['operations'],
+                    )] * processes
+                    start = time.perf_counter()
+                    if processes == 1:
+                        timings = [run_operation(*arguments[0])]
+                    else:
+                        with context.Pool(processes) as pool:
+                            timings = pool.starmap(run_operation, arguments)
+                    duration = time.perf_counter() - start
+                    timings = [value for part in timings for value in part]
+                    results[backend][operation] = {
+                        **benchmark.summarize(timings),
+                        'throughput': round(len(timings) / duration),
+                    }
+                    self.stdout.write(
+                        '{:<10} {:<9} p50 {p50:>7} p99 {p99:>7} мс, '
+                        '{throughput:>7} операций/с'.format(
+                            backend, operation,
+                            **results[backend][operation]))
+                if processes > 1 and backend in SHARED:
+                    # Потерянные увеличения - incr не атомарен между
+                    # процессами
+                    lost = processes * options['operations'] - cache.get(
+                        COUNTER, 0)
+                    results[backend]['incr']['lost'] = lost
+                    self.stdout.write(
+                        f'{backend:<10} incr: потеряно увеличений {lost}')
+                cache.clear()
+        if options['output']:
+            result = {
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'environment': benchmark.environment(),
+                'processes': processes,
+                'operations': options['operations'],
+                'keys': options['keys'],
+                'value_size': options['value_size'],
+                'backends': results,
+            }
+            with open(options['output'], 'w') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
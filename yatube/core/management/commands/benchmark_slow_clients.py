@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+async def slow_client(host, port, path, chunk_delay, stop):
+    """Клиент на медленной сети: пишет запрос и читает ответ по кусочку."""
+    request = (
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+        f'Connection: close\r\n\r\n').encode()
+    while not stop.is_set():
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(chunk_delay)
+            continue
+        try:
+            for start in range(0, len(request), 16):
+                writer.write(request[start:start + 16])
+                await writer.drain()
+                await asyncio.sleep(chunk_delay)
+            while not stop.is_set() and await reader.read(512):
+                await asyncio.sleep(chunk_delay)
+        except OSError:
+            pass
+        finally:
+            writer.close()
+
+
+async def fast_request(host, port, path):
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+        f'Connection: close\r\n\r\n'.encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return time.perf_counter() - start, status_line.split(b' ')[1:2]
+
+
+async def run(url, paths, slow, requests, concurrency, chunk_delay):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    stop = asyncio.Event()
+    slow_tasks = [
+        asyncio.ensure_future(slow_client(
+            host, port, paths[number % len(paths)], chunk_delay, stop))
+        for number in range(slow)
+    ]
+    # Медленные клиенты успевают занять сервер до замера
+    await asyncio.sleep(chunk_delay * 5)
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, errors = [], 0
+
+    async def one(number):
+        nonlocal errors
+        async with semaphore:
+            try:
+                elapsed, status = await asyncio.wait_for(
+                    fast_request(host, port, paths[number % len(paths)]),
+                    timeout=60)
+            except (OSError, asyncio.TimeoutError):
+                errors += 1
+                return
+            if status != [b'200']:
+                errors += 1
+            timings.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    duration = time.perf_counter() - started
+    stop.set()
+    for task in slow_tasks:
+        task.cancel()
+    await asyncio.gather(*slow_tasks, return_exceptions=True)
+    return timings, errors, duration
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность работающего сервера, пока его соединения '
+        'заняты медленными клиентами: сравните WSGI (runserver, gunicorn) '
+        'и ASGI (uvicorn yatube.asgi:application)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='Адрес сервера, http://host:port')
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Страницы для запросов (по умолчанию /)')
+        parser.add_argument(
+            '--slow-clients', type=int, default=100,
+            help='Число одновременных медленных клиентов')
+        parser.add_argument(
+            '--chunk-delay', type=float, default=0.5,
+            help='Пауза медленного клиента между кусками, секунды')
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Число замеряемых быстрых запросов')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument(
+            '--label', default='',
+            help='Подпись прогона, например wsgi или asgi')
+        parser.add_argument('--output', default=None)
+        parser.add_argument(
+            '--compare', default=None,
+            help='JSON прошлого прогона для сравнения пропускной способности')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/']
+        timings, errors, duration = asyncio.run(run(
+            options['url'], paths, options['slow_clients'],
+            options['requests'], options['concurrency'],
+            options['chunk_delay'],
+        ))
+        if not timings:
+            raise CommandError('Ни один запрос не выполнен')
+        result = {
+            'label': options['label'],
+            'url': options['url'],
+            'paths': paths,
+            'slow_clients': options['slow_clients'],
+            'concurrency': options['concurrency'],
+            'requests': options['requests'],
+            'errors': errors,
+            'throughput': round(len(timings) / duration, 2),
+            **benchmark.summarize(timings),
+        }
+        self.stdout.write(
+            '{label}: {throughput} запросов/с, p50 {p50} мс, '
+            'p99 {p99} мс, ошибок {errors}'.format(**result))
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare']) as file:
+                baseline = json.load(file)
+            ratio = result['throughput'] / baseline['throughput']
+            self.stdout.write(
+                f'{result["label"]} / {baseline["label"]}: '
+                f'пропускная способность x{ratio:.2f}')
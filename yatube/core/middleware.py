@@ -0,0 +1,39 @@
+import logging
+
+from django.conf import settings
+
+from .queries import QueryBudgetExceeded, QueryRecorder, check_budget
+
+logger = logging.getLogger('core.queries')
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы каждого запроса и сверяет их с бюджетом view.
+
+    Бюджеты задаются в ``QUERY_BUDGETS`` по имени URL (``posts:index``),
+    остальным view достаётся ``QUERY_BUDGET_DEFAULT``. Нарушения пишутся
+    в лог ``core.queries``, а при ``QUERY_BUDGET_RAISE`` - поднимают
+    ``QueryBudgetExceeded``. Заголовки с числом запросов и временем БД
+    добавляются в ответ только при ``DEBUG`` или ``QUERY_BUDGET_HEADERS``:
+    клиентам сайта незачем знать устройство бэкенда.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        request.query_recorder = recorder
+        if settings.DEBUG or settings.QUERY_BUDGET_HEADERS:
+            response['X-DB-Queries'] = str(recorder.count)
+            response['X-DB-Time'] = f'{recorder.duration * 1000:.1f}ms'
+        match = request.resolver_match
+        if match is None:
+            return response
+        problems = check_budget(recorder, match.view_name)
+        if problems and settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded('; '.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+        return response
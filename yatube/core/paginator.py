@@ -0,0 +1,222 @@
+"""Постраничный вывод по курсору (keyset pagination).
+
+Страница выбирается условием ``(pub_date, id) < курсор`` вместо OFFSET,
+поэтому дальние страницы стоят столько же, сколько первая, а общее
+число записей (``paginator.count``) считается только по запросу.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, InvalidPage, Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from . import concurrency
+from .cache import get_generations, get_or_compute
+
+ELLIPSIS = '…'
+COUNT_KEY = 'count:{}'
+
+
+def encode_cursor(values, backwards=False):
+    """Упаковывает позицию в непрозрачный токен для URL."""
+    # isoformat() вместо DjangoJSONEncoder: тот обрезает микросекунды,
+    # и записи с одинаковой миллисекундой терялись бы между страницами.
+    payload = json.dumps(
+        [list(values), backwards], default=lambda value: value.isoformat())
+    token = base64.urlsafe_b64encode(payload.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен; для испорченного токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values, backwards = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+    return values, bool(backwards)
+
+
+def elided_page_range(number, num_pages, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей и по краям, пропуски - ``ELLIPSIS``.
+
+    Число элементов не зависит от числа страниц, поэтому ссылки
+    на миллион постов стоят столько же, сколько на сотню.
+    """
+    if num_pages <= (on_each_side + on_ends) * 2 + 1:
+        yield from range(1, num_pages + 1)
+        return
+    if number > 1 + on_each_side + on_ends + 1:
+        yield from range(1, on_ends + 1)
+        yield ELLIPSIS
+        yield from range(number - on_each_side, number + 1)
+    else:
+        yield from range(1, number + 1)
+    if number < num_pages - on_each_side - on_ends - 1:
+        yield from range(number + 1, number + on_each_side + 1)
+        yield ELLIPSIS
+        yield from range(num_pages - on_ends + 1, num_pages + 1)
+    else:
+        yield from range(number + 1, num_pages + 1)
+
+
+def fetch_page(paginator, number):
+    """``Paginator.get_page``, но COUNT и строки страницы читаются
+    одновременно (см. ``core.concurrency``)."""
+    try:
+        number = int(number or 1)
+    except (TypeError, ValueError):
+        number = 1
+    if number < 1 or paginator.orphans or not concurrency.is_enabled():
+        return paginator.get_page(number)
+    bottom = (number - 1) * paginator.per_page
+    results = concurrency.fetch(
+        count=lambda: paginator.count,
+        rows=lambda: list(
+            paginator.object_list[bottom:bottom + paginator.per_page]),
+    )
+    if number > paginator.num_pages:
+        return paginator.get_page(number)
+    return paginator._get_page(results['rows'], number, paginator)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий число записей из кэша.
+
+    Значение действительно, пока не сменились поколения областей
+    ``scopes`` (см. core.cache), и пересчитывается одним запросом.
+    """
+
+    def __init__(self, object_list, per_page, scopes, **kwargs):
+        self.scopes = scopes
+        super().__init__(object_list, per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        try:
+            sql = str(self.object_list.query)
+        except EmptyResultSet:
+            return 0
+        return get_or_compute(
+            COUNT_KEY.format(hashlib.md5(sql.encode()).hexdigest()),
+            self.object_list.count, settings.COUNT_CACHE_TIMEOUT,
+            version=get_generations(self.scopes))
+
+
+class CursorPaginator(Paginator):
+    """Paginator, листающий queryset по ключу ``(field, pk)``.
+
+    ``lookups`` - пара атрибутов ``(field, уникальный id)``, если
+    для равных дат порядок задаёт не pk (например, ``post_id`` у записей
+    ленты), по умолчанию ``(field, 'pk')``.
+    """
+
+    def __init__(self, object_list, per_page, field='pub_date', lookups=None):
+        self.field = field
+        self.lookups = lookups or (field, 'pk')
+        super().__init__(
+            object_list.order_by(*(f'-{lookup}' for lookup in self.lookups)),
+            per_page,
+        )
+
+    def _position(self, token):
+        position = decode_cursor(token or '')
+        if position is None:
+            return None
+        values, backwards = position
+        try:
+            value, pk = values
+            field = self.object_list.model._meta.get_field(self.field)
+            return field.to_python(value), int(pk), backwards
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def _cursor(self, obj, backwards=False):
+        return encode_cursor(
+            [getattr(obj, lookup) for lookup in self.lookups],
+            backwards=backwards)
+
+    def get_page(self, cursor):
+        """Возвращает страницу после (или перед) позицией курсора."""
+        position = self._position(cursor)
+        queryset = self.object_list
+        backwards = False
+        if position is not None:
+            value, pk, backwards = position
+            key, tiebreak = self.lookups
+            if backwards:
+                queryset = queryset.filter(
+                    Q(**{f'{key}__gt': value})
+                    | Q(**{key: value, f'{tiebreak}__gt': pk})
+                ).order_by(*self.lookups)
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{key}__lt': value})
+                    | Q(**{key: value, f'{tiebreak}__lt': pk})
+                )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        has_next = has_more if not backwards else position is not None
+        has_previous = has_more if backwards else position is not None
+        page = CursorPage(rows, self)
+        if rows and has_next:
+            page.next_cursor = self._cursor(rows[-1])
+        if rows and has_previous:
+            page.previous_cursor = self._cursor(rows[0], backwards=True)
+        return page
+
+    def page(self, number):
+        """Первая страница; дальше листают курсором (см. ``get_page``)."""
+        if self.validate_number(number) != 1:
+            raise InvalidPage(
+                'Страницы после первой открываются по курсору.')
+        return self.get_page(None)
+
+
+class CursorPage(Page):
+    """Страница курсорного вывода; номера страницы у неё нет.
+
+    Номера соседних страниц и записей без OFFSET неизвестны, поэтому
+    методы ``Page`` для них возвращают None, а за краем списка, как
+    у ``Page``, поднимают ``EmptyPage``. Ссылки строятся по
+    ``next_cursor`` и ``previous_cursor``.
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def __repr__(self):
+        return '<Page after cursor>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def next_page_number(self):
+        if not self.has_next():
+            raise EmptyPage('Это последняя страница.')
+        return None
+
+    def previous_page_number(self):
+        if not self.has_previous():
+            raise EmptyPage('Это первая страница.')
+        return None
+
+    def start_index(self):
+        return None
+
+    def end_index(self):
+        return None
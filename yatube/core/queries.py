@@ -0,0 +1,103 @@
+"""Учёт SQL-запросов запроса и поиск N+1.
+
+``QueryRecorder`` подключается ко всем соединениям через
+``execute_wrapper`` и для каждого запроса запоминает его «форму» -
+SQL без параметров, где списки ``IN (%s, %s, ...)`` свёрнуты. Одна и та же
+форма, выполненная много раз за запрос, почти всегда означает N+1:
+обращение к связанному объекту в цикле по списку.
+
+Соединения у каждого потока свои; потоки пула ``core.concurrency``
+подключают учёт активных в запросе счётчиков через ``attached``.
+"""
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+PLACEHOLDERS = re.compile(r'\((?:%s,\s*)+%s\)')
+_active = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к странице превысил бюджет SQL-запросов."""
+
+
+def query_shape(sql):
+    return PLACEHOLDERS.sub('(%s, ...)', sql)
+
+
+class QueryRecorder:
+    """Контекстный менеджер, считающий запросы и время БД."""
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.count = 0
+        self.duration = 0.0
+        self._stack = None
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.duration += time.monotonic() - start
+                self.count += 1
+                self.shapes[query_shape(sql)] += 1
+
+    @contextmanager
+    def attached(self):
+        """Считает запросы соединений текущего потока."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        self._stack.enter_context(self.attached())
+        if not hasattr(_active, 'recorders'):
+            _active.recorders = []
+        _active.recorders.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.recorders.remove(self)
+        self._stack.close()
+
+    def repeated(self, limit=None):
+        """Формы запросов, выполненные больше ``limit`` раз."""
+        if limit is None:
+            limit = settings.QUERY_REPEAT_LIMIT
+        return {
+            shape: count
+            for shape, count in self.shapes.most_common()
+            if count > limit
+        }
+
+
+def active_recorders():
+    """Счётчики, открытые в текущем потоке."""
+    return list(getattr(_active, 'recorders', ()))
+
+
+def budget_for(view_name):
+    return settings.QUERY_BUDGETS.get(
+        view_name, settings.QUERY_BUDGET_DEFAULT)
+
+
+def check_budget(recorder, view_name):
+    """Список нарушений: превышение бюджета и повторяющиеся запросы."""
+    problems = []
+    budget = budget_for(view_name)
+    if recorder.count > budget:
+        problems.append(
+            f'{view_name}: {recorder.count} SQL-запросов при бюджете {budget}')
+    for shape, count in recorder.repeated().items():
+        problems.append(f'{view_name}: N+1, {count} раз: {shape}')
+    return problems
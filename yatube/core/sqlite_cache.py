@@ -0,0 +1,274 @@
+"""Бэкенд кэша в SQLite, общий для всех процессов на хосте.
+
+``LocMemCache`` у каждого воркера gunicorn свой: кэш прогревается
+отдельно в каждом процессе, а сброс поколения в одном воркере не виден
+остальным. Этот бэкенд хранит записи в файле SQLite в режиме WAL:
+читатели не блокируют писателя, а отдельный сервер вроде Redis
+не нужен.
+
+- TTL: срок жизни хранится рядом со значением, просроченные записи
+  не читаются и удаляются при чистке.
+- LRU: чтение отмечает время доступа (не чаще раза в
+  ``ACCESS_RESOLUTION`` секунд, чтобы чтения не превращались в записи),
+  при переполнении удаляются давно не читанные записи.
+- ``incr`` атомарен между процессами: целые числа хранятся в SQLite как
+  INTEGER и увеличиваются UPDATE внутри транзакции записи.
+
+Запросы обходятся без UPSERT и RETURNING: SQLite в Python 3.7-3.9
+бывает старше 3.24.
+
+Переполнение проверяется раз в ``CULL_EVERY`` записей процесса, поэтому
+``MAX_ENTRIES`` может ненадолго превышаться на эту величину.
+
+    CACHES = {'default': {
+        'BACKEND': 'core.sqlite_cache.SQLiteCache',
+        'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_EVERY': 100},
+    }}
+"""
+import itertools
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+    'expires REAL, accessed REAL NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+ALIVE = '(expires IS NULL OR expires > ?)'
+# Сколько секунд ждать блокировку записи другим процессом
+BUSY_TIMEOUT = 5
+ACCESS_RESOLUTION = 1
+# Ограничение SQLite на число параметров запроса - с запасом
+CHUNK_SIZE = 500
+INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def encode(value):
+    # bool - тоже int, но должен вернуться как bool
+    if type(value) is int and value in INTEGER_RANGE:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def decode(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+def chunks(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def placeholders(items):
+    return ', '.join('?' * len(items))
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        options = params.get('OPTIONS', {})
+        self._cull_every = options.get('CULL_EVERY', 100)
+        self._writes = itertools.count(1)
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока; после fork - новое
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self._path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            local.db, local.pid = db, os.getpid()
+        return local.db
+
+    @contextmanager
+    def _write(self):
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _fetch(self, keys):
+        now = time.time()
+        found, stale = {}, []
+        for chunk in chunks(keys):
+            rows = self._db.execute(
+                f'SELECT key, value, accessed FROM cache '
+                f'WHERE key IN ({placeholders(chunk)}) AND {ALIVE}',
+                (*chunk, now))
+            for key, value, accessed in rows:
+                found[key] = decode(value)
+                if now - accessed > ACCESS_RESOLUTION:
+                    stale.append(key)
+        if stale:
+            self._touch(stale, now)
+        return found
+
+    def _touch(self, keys, now):
+        # Отметка доступа не стоит ожидания занятой базы: без
+        # ожидания блокировки, а занято - пропустить
+        db = self._db
+        db.execute('PRAGMA busy_timeout = 0')
+        try:
+            for chunk in chunks(keys):
+                db.execute(
+                    f'UPDATE cache SET accessed = ? '
+                    f'WHERE key IN ({placeholders(chunk)})', (now, *chunk))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            db.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000}')
+
+    def _store(self, data, timeout):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        with self._write() as db:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                [(key, encode(value), expires, now)
+                 for key, value in data.items()])
+        self._maybe_cull()
+
+    def _maybe_cull(self):
+        if next(self._writes) % self._cull_every == 0:
+            self.cull()
+
+    def cull(self):
+        """Удаляет просроченные записи и давно не читанные сверх лимита."""
+        with self._write() as db:
+            db.execute(
+                'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+            count, = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+            if count <= self._max_entries:
+                return
+            if self._cull_frequency == 0:
+                db.execute('DELETE FROM cache')
+                return
+            excess = (count - self._max_entries
+                      + self._max_entries // self._cull_frequency)
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (excess,))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as db:
+            # Просроченная запись считается отсутствующей
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now))
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?)',
+                (key, encode(value), self.get_backend_timeout(timeout), now),
+            ).rowcount
+        self._maybe_cull()
+        return bool(added)
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        return {
+            keys[key]: value for key, value in self._fetch(keys).items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store({self._key(key, version): value}, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store(
+            {self._key(key, version): value for key, value in data.items()},
+            timeout)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        with self._write() as db:
+            return bool(db.execute(
+                f'UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}',
+                (self.get_backend_timeout(timeout), key, time.time()),
+            ).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        made_key = self._key(key, version)
+        with self._write() as db:
+            now = time.time()
+            if encode(delta) == delta:
+                updated = db.execute(
+                    f'UPDATE cache SET value = value + ? WHERE key = ? '
+                    f"AND {ALIVE} AND typeof(value) = 'integer' "
+                    f'AND value + ? BETWEEN ? AND ?',
+                    (delta, made_key, now, delta,
+                     INTEGER_RANGE.start, INTEGER_RANGE.stop - 1),
+                ).rowcount
+                if updated:
+                    # Та же транзакция записи: значение не изменится
+                    return db.execute(
+                        'SELECT value FROM cache WHERE key = ?',
+                        (made_key,)).fetchone()[0]
+            # Нецелое значение или выход за INTEGER - через pickle
+            row = db.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {ALIVE}',
+                (made_key, now)).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = decode(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (encode(value), made_key))
+        return value
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {ALIVE}',
+            (key, time.time())).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        with self._write() as db:
+            return bool(db.execute(
+                'DELETE FROM cache WHERE key = ?', (key,)).rowcount)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        with self._write() as db:
+            for chunk in chunks(keys):
+                db.execute(
+                    f'DELETE FROM cache '
+                    f'WHERE key IN ({placeholders(chunk)})', chunk)
+
+    def clear(self):
+        with self._write() as db:
+            db.execute('DELETE FROM cache')
@@ -0,0 +1,58 @@
+"""Файловое хранилище с адресацией по содержимому.
+
+Файл сохраняется под SHA-256 своего содержимого:
+``<каталог upload_to>/<2 знака>/<digest><расширение>``. Одинаковые
+загрузки получают одно имя и хранятся один раз, а миниатюры sorl,
+ключом которых служит имя исходника, строятся тоже один раз на digest.
+
+Digest, посчитанный загрузчиком во время приёма файла
+(см. core.uploads), используется без повторного чтения.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+ADDRESS = re.compile(r'(?:^|/)([0-9a-f]{2})/(\1[0-9a-f]{62})(\.\w+)?$')
+
+
+def file_digest(content):
+    """SHA-256 содержимого файла, посчитанный по кускам."""
+    digest = getattr(content, 'content_digest', None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def is_addressed(name):
+    """Имя файла построено из его digest."""
+    return bool(name and ADDRESS.search(name))
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def address(self, name, digest):
+        directory = os.path.dirname(name)
+        if is_addressed(name):
+            # Имя уже построено из digest: каталог upload_to выше
+            directory = os.path.dirname(directory)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(
+            directory, digest[:2], f'{digest}{extension}').replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        target = self.address(name, file_digest(content))
+        if self.exists(target):
+            # Такой файл уже загружен: повторно не пишем
+            return target
+        return self._save(target, content)
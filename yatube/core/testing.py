@@ -0,0 +1,44 @@
+"""Окружение прогона тестов.
+
+Тесты работают с тем же бэкендом кэша, что и сервер, но в своём файле
+во временном каталоге: ``cache.clear()`` в тестах не стирает общий
+кэш хоста, а записи сервера и прошлых прогонов не попадают в новую
+тестовую базу. Фоновая очистка картинок и нарезка миниатюр выключены,
+их тесты включают нужное через ``override_settings``.
+
+``manage.py test`` подключает окружение через ``TEST_RUNNER``,
+pytest - фикстурой в ``tests/conftest.py``.
+"""
+import os
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+@contextmanager
+def isolated_settings():
+    """Настройки тестов на время блока."""
+    with tempfile.TemporaryDirectory() as directory:
+        caches = {
+            alias: {**params, 'LOCATION': os.path.join(
+                directory, f'{alias}.sqlite3')}
+            for alias, params in settings.CACHES.items()
+        }
+        with override_settings(
+                CACHES=caches, IMAGE_CLEANUP=False,
+                THUMBNAIL_PREGENERATE=False):
+            yield
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._isolation = ExitStack()
+        self._isolation.enter_context(isolated_settings())
+
+    def teardown_test_environment(self, **kwargs):
+        self._isolation.close()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,196 @@
+import hashlib
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from ..cache import (LOCK_KEY, PAGE_KEY, bump_generation, get_generations,
+                     get_or_compute, page_cache_stats, reset_page_cache_stats)
+from ..paginator import CachedCountPaginator
+
+User = get_user_model()
+INDEX = 'posts:index'
+GROUP_LIST = 'posts:group_list'
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        reset_page_cache_stats()
+
+    def test_bump_changes_generation(self):
+        """Новое поколение отличается от прежнего."""
+        before, = get_generations(['scope'])
+        bump_generation('scope')
+        self.assertNotEqual(get_generations(['scope']), [before])
+
+    def test_anonymous_page_is_cached_until_post_saved(self):
+        """Страница берётся из кэша, пока не изменились посты."""
+        self.client.get(reverse(INDEX))
+        Post.objects.update(text='Без сигналов')
+        response = self.client.get(reverse(INDEX))
+        self.assertIsNone(response.context)
+        self.assertEqual(page_cache_stats()['hits'], 1)
+
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.client.get(reverse(INDEX))
+        self.assertContains(response, 'Новый пост')
+
+    @override_settings(PAGE_CACHE_STATS_INTERVAL=60)
+    def test_stats_counted_in_process(self):
+        """Попадания не пишутся в кэш на каждом запросе."""
+        self.client.get(reverse(INDEX))
+        with mock.patch.object(cache, 'incr') as incr:
+            for _ in range(3):
+                self.assertIsNone(self.client.get(reverse(INDEX)).context)
+        incr.assert_not_called()
+        self.assertEqual(page_cache_stats()['hits'], 3)
+
+    def test_group_pages_expire_by_own_scope(self):
+        """Пост в группе сбрасывает только страницы этой группы."""
+        other_url = reverse(GROUP_LIST, kwargs={'slug': 'other'})
+        url = reverse(GROUP_LIST, kwargs={'slug': 'group'})
+        self.client.get(other_url)
+        self.client.get(url)
+        post = Post.objects.create(
+            author=self.user, text='В группе', group=self.group)
+        self.assertIsNone(self.client.get(other_url).context)
+        self.assertContains(self.client.get(url), 'В группе')
+
+        post.group = self.other_group
+        post.save()
+        self.assertNotContains(self.client.get(url), 'В группе')
+        self.assertContains(self.client.get(other_url), 'В группе')
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_expired_page_not_served_while_locked(self):
+        """Сброшенная страница не отдаётся, даже пока её пересчитывают."""
+        url = reverse(INDEX)
+        self.client.get(url)
+        Post.objects.create(author=self.user, text='Новый пост')
+        path = hashlib.md5(url.encode()).hexdigest()
+        cache.add(LOCK_KEY.format(PAGE_KEY.format(path)), 1)
+        self.assertContains(self.client.get(url), 'Новый пост')
+
+    def test_post_count_cached_by_generation(self):
+        Post.objects.create(author=self.user, text='Пост')
+        posts = Post.objects.filter(author=self.user)
+        self.assertEqual(
+            CachedCountPaginator(posts, 10, ['scope']).count, 1)
+        Post.objects.create(author=self.user, text='Ещё пост')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                CachedCountPaginator(posts, 10, ['scope']).count, 1)
+        bump_generation('scope')
+        self.assertEqual(
+            CachedCountPaginator(posts, 10, ['scope']).count, 2)
+
+    def test_authorized_pages_are_not_cached(self):
+        """Авторизованным пользователям страницы не кэшируются."""
+        self.client.force_login(self.user)
+        self.client.get(reverse(INDEX))
+        self.assertIsNotNone(self.client.get(reverse(INDEX)).context)
+
+
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value='value', delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_value_cached_until_version_changes(self):
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'value')
+        get_or_compute('key', self.compute(), 60)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(
+            get_or_compute('key', self.compute('new'), 60, version=2), 'new')
+        self.assertEqual(self.calls, 2)
+
+    def test_single_flight(self):
+        """Одновременные промахи считают значение один раз."""
+        results = []
+
+        def worker():
+            results.append(
+                get_or_compute('key', self.compute(delay=0.2), 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['value'] * 5)
+        self.assertEqual(self.calls, 1)
+
+    def test_expiring_value_served_while_locked(self):
+        """Истёкшее значение той же версии отдаётся при пересчёте."""
+        cache.set('key', ('old', 1, time.time() - 1, 0))
+        cache.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(
+            get_or_compute('key', self.compute('new'), 60, version=1), 'old')
+        self.assertEqual(self.calls, 0)
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_other_version_not_served_while_locked(self):
+        """Смена поколения при занятой блокировке не отдаёт старое."""
+        get_or_compute('key', self.compute('old'), 60, version=1)
+        cache.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(
+            get_or_compute('key', self.compute('new'), 60, version=2), 'new')
+
+    def test_waiter_gets_value_of_its_version(self):
+        """Ждущий запрос получает значение новой версии от считающего."""
+        get_or_compute('key', self.compute('old'), 60, version=1)
+        cache.add(LOCK_KEY.format('key'), 1)
+
+        def finish():
+            time.sleep(0.1)
+            cache.set('key', ('new', 2, time.time() + 60, 0))
+
+        thread = threading.Thread(target=finish)
+        thread.start()
+        value = get_or_compute('key', self.compute('own'), 60, version=2)
+        thread.join()
+        self.assertEqual(value, 'new')
+        self.assertEqual(self.calls, 1)
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_computes_when_waiting_times_out(self):
+        cache.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'value')
+        self.assertEqual(self.calls, 1)
+
+    def test_probabilistic_early_expiration(self):
+        """Дорогое значение перед сроком пересчитывается заранее."""
+        cache.set('key', ('old', None, time.time() + 1, 10))
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            with override_settings(CACHE_EARLY_BETA=0):
+                self.assertEqual(
+                    get_or_compute('key', self.compute('new'), 60), 'old')
+            self.assertEqual(
+                get_or_compute('key', self.compute('new'), 60), 'new')
+
+    def test_not_cacheable_value_not_stored(self):
+        get_or_compute('key', self.compute(None), 60, cacheable=bool)
+        self.assertIsNone(cache.get('key'))
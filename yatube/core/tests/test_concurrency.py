@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import (LiveServerTestCase, SimpleTestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+from .. import concurrency
+from ..queries import QueryRecorder
+
+User = get_user_model()
+
+
+@override_settings(CONCURRENT_READS=True)
+class FetchTests(SimpleTestCase):
+    def test_functions_run_in_pool(self):
+        """Функции выполняются в других потоках, результаты по именам."""
+        found = concurrency.fetch(
+            first=threading.get_ident, second=lambda: 2)
+        self.assertNotEqual(found['first'], threading.get_ident())
+        self.assertEqual(found['second'], 2)
+
+    def test_errors_reach_caller(self):
+        """Исключение функции поднимается в вызывающем потоке."""
+        with self.assertRaises(ZeroDivisionError):
+            concurrency.fetch(good=lambda: 1, bad=lambda: 1 / 0)
+
+
+class ConcurrentViewsTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.reader = User.objects.create(username='reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        for number in range(15):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        self.client.force_login(self.reader)
+
+    def context(self, url):
+        response = self.client.get(url)
+        return {
+            'posts': list(response.context['page_obj']),
+            'count': response.context['page_obj'].paginator.count,
+            'following': response.context['following'],
+        }
+
+    def test_profile_matches_serial_rendering(self):
+        """Одновременное чтение даёт ту же страницу, что и по очереди."""
+        url = reverse('posts:profile', kwargs={'username': 'author'}) + (
+            '?page=2')
+        serial = self.context(url)
+        with self.settings(CONCURRENT_READS=True):
+            self.assertEqual(self.context(url), serial)
+        self.assertEqual(serial['count'], 15)
+        self.assertTrue(serial['following'])
+
+    def test_pool_queries_are_counted(self):
+        """Запросы потоков пула попадают в счётчик запроса."""
+        with self.settings(CONCURRENT_READS=True), \
+                QueryRecorder() as recorder:
+            found = concurrency.fetch(
+                users=User.objects.count, posts=Post.objects.count)
+        self.assertEqual(found, {'users': 2, 'posts': 15})
+        self.assertEqual(recorder.count, 2)
+
+
+class SlowClientsBenchmarkTests(LiveServerTestCase):
+    def test_reports_throughput(self):
+        """Замер под медленными клиентами сохраняет JSON."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'wsgi.json')
+            call_command(
+                'benchmark_slow_clients', self.live_server_url,
+                path=[reverse('about:author')], slow_clients=2,
+                chunk_delay=0.01, requests=5, concurrency=2,
+                label='wsgi', output=output, stdout=StringIO())
+            with open(output) as file:
+                result = json.load(file)
+        self.assertEqual(result['errors'], 0)
+        self.assertGreater(result['throughput'], 0)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+from django.test import SimpleTestCase, override_settings
+
+from ..events import hub, sse_app
+
+
+@override_settings(EVENTS_HEARTBEAT=0.05)
+class EventStreamTests(SimpleTestCase):
+    def stream(self, channels, publish, messages=3):
+        """Запускает поток, публикует события и собирает ответ."""
+        sent = []
+        disconnect = None
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if len(sent) == 1:
+                threading.Thread(
+                    target=when_subscribed, args=(publish,)).start()
+            if len(sent) >= messages:
+                disconnect.set()
+
+        async def run():
+            nonlocal disconnect
+            disconnect = asyncio.Event()
+            app = sse_app(lambda scope: channels)
+            await asyncio.wait_for(app({}, receive, send), 5)
+
+        asyncio.run(run())
+        return sent
+
+
+def when_subscribed(publish):
+    # Подписка создаётся после заголовков и retry
+    deadline = time.monotonic() + 5
+    while not hub.count() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    publish()
+
+    def test_published_event_is_streamed(self):
+        """Событие из другого потока доходит до подписчика канала."""
+        sent = self.stream(['group:cats'], lambda: hub.publish(
+            ['posts', 'group:cats'],
+            {'id': 7, 'type': 'post', 'data': {'id': 7}}), messages=4)
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertIn(
+            b'id: 7\nevent: post\ndata: {"id": 7}\n\n',
+            [message.get('body') for message in sent])
+        self.assertEqual(hub.count(), 0)
+
+    def test_idle_stream_sends_heartbeat(self):
+        """Без событий клиент получает пинги."""
+        sent = self.stream(['group:dogs'], lambda: hub.publish(
+            ['group:cats'], {'type': 'post', 'data': {}}))
+        self.assertEqual(sent[2]['body'], b': ping\n\n')
+
+    def test_forbidden_scope(self):
+        """Без каналов подписки ответ 403."""
+        sent = self.stream(None, lambda: None, messages=2)
+        self.assertEqual(sent[0]['status'], 403)
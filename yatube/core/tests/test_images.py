@@ -0,0 +1,106 @@
+import os
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.forms import ValidationError
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from ..images import BoundedImageField, strip_metadata
+from ..uploads import DigestTemporaryFileUploadHandler
+
+
+def image_bytes(size=(40, 20), image_format='PNG', **options):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def upload(data, name='image.png'):
+    return SimpleUploadedFile(name, data, 'image/png')
+
+
+@override_settings(UPLOAD_MAX_SIZE=100_000, UPLOAD_MAX_PIXELS=10_000)
+class BoundedImageFieldTests(SimpleTestCase):
+    def clean(self, file):
+        return BoundedImageField().clean(file)
+
+    def test_small_image_accepted(self):
+        self.assertEqual(self.clean(upload(image_bytes())).image.size,
+                         (40, 20))
+
+    def test_large_file_rejected(self):
+        """Файл больше предела отклоняется до разбора картинки."""
+        file = upload(b'x' * 100_001)
+        with self.assertRaisesMessage(ValidationError, 'Файл больше'):
+            self.clean(file)
+
+    def test_truncated_upload_rejected(self):
+        """Обрезанный загрузчиком файл отклоняется по размеру."""
+        file = upload(image_bytes())
+        file.too_large = True
+        with self.assertRaisesMessage(ValidationError, 'Файл больше'):
+            self.clean(file)
+
+    def test_too_many_pixels_rejected(self):
+        """Размеры берутся из заголовка: сжатая «бомба» не проходит."""
+        bomb = image_bytes(size=(2000, 2000))
+        self.assertLess(len(bomb), 100_000)
+        with self.assertRaisesMessage(ValidationError, '2000×2000'):
+            self.clean(upload(bomb))
+
+    def test_broken_image_rejected(self):
+        with self.assertRaises(ValidationError):
+            self.clean(upload(b'not an image'))
+
+
+class SizeLimitHandlerTests(SimpleTestCase):
+    @override_settings(UPLOAD_MAX_SIZE=32)
+    def test_excess_not_written(self):
+        """Сверх предела байты отбрасываются, файл помечается."""
+        handler = DigestTemporaryFileUploadHandler()
+        handler.new_file('image', 'big.png', 'image/png', 64)
+        for start in range(0, 64, 16):
+            handler.receive_data_chunk(b'x' * 16, start)
+        file = handler.file_complete(64)
+        self.assertTrue(file.too_large)
+        self.assertEqual(os.path.getsize(file.temporary_file_path()), 32)
+        file.close()
+
+    def test_small_file_kept(self):
+        handler = DigestTemporaryFileUploadHandler()
+        handler.new_file('image', 'small.png', 'image/png', 16)
+        handler.receive_data_chunk(b'x' * 16, 0)
+        file = handler.file_complete(16)
+        self.assertFalse(file.too_large)
+        file.close()
+
+
+class StripMetadataTests(SimpleTestCase):
+    def write(self, data, suffix):
+        file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(data)
+        return file.name
+
+    def test_exif_removed_and_rotation_applied(self):
+        """EXIF не сохраняется, поворот из него применяется к пикселям."""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # повёрнуто на 90°
+        exif[0x010F] = 'Камера'
+        path = self.write(
+            image_bytes(image_format='JPEG', exif=exif.tobytes()), '.jpg')
+        with Image.open(BytesIO(strip_metadata(path, 10_000))) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (20, 40))
+            self.assertNotIn('exif', image.info)
+
+    def test_animation_kept(self):
+        buffer = BytesIO()
+        frames = [Image.new('P', (4, 4), color) for color in (1, 2)]
+        frames[0].save(
+            buffer, 'GIF', save_all=True, append_images=frames[1:])
+        path = self.write(buffer.getvalue(), '.gif')
+        self.assertIsNone(strip_metadata(path, 10_000))
@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from posts.models import Group
+
+from ..loader import CachedLoader
+
+
+class CachedLoaderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='Описание')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.loader = CachedLoader('test_group', Group.objects.all())
+
+    def test_misses_loaded_in_one_query(self):
+        """Промахи догружаются одним запросом и попадают в кэш."""
+        ids = [group.pk for group in self.groups]
+        with self.assertNumQueries(1):
+            found = self.loader.load_many(ids + ids[:1])
+        self.assertEqual(sorted(found), ids)
+        with mock.patch.object(
+                cache, 'get_many', wraps=cache.get_many) as get_many, \
+                self.assertNumQueries(0):
+            self.assertEqual(
+                self.loader.load_many(ids)[ids[0]].title, 'Группа 0')
+        get_many.assert_called_once()
+
+    def test_only_misses_queried(self):
+        self.loader.load_many([self.groups[0].pk])
+        with mock.patch.object(
+                QuerySet, 'in_bulk',
+                autospec=True, return_value={}) as in_bulk:
+            self.loader.load_many([group.pk for group in self.groups])
+        self.assertEqual(
+            in_bulk.call_args[0][1],
+            [self.groups[1].pk, self.groups[2].pk])
+
+    def test_unknown_ids_skipped(self):
+        self.assertEqual(self.loader.load_many([0]), {})
+        self.assertEqual(self.loader.load_many([]), {})
+
+    def test_forget(self):
+        group = self.groups[0]
+        self.loader.load_many([group.pk])
+        Group.objects.filter(pk=group.pk).update(title='Новое название')
+        self.assertEqual(
+            self.loader.load_many([group.pk])[group.pk].title, 'Группа 0')
+        self.loader.forget(group.pk)
+        self.assertEqual(
+            self.loader.load_many([group.pk])[group.pk].title,
+            'Новое название')
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, InvalidPage
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+from ..paginator import (ELLIPSIS, CursorPaginator, decode_cursor,
+                         elided_page_range, encode_cursor)
+
+User = get_user_model()
+PER_PAGE = 4
+POSTS_COUNT = 13
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+        for i in range(POSTS_COUNT):
+            Post.objects.create(author=cls.user, text=f'{i}')
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self):
+        return CursorPaginator(Post.objects.all(), PER_PAGE)
+
+    def test_walk_forward_and_back(self):
+        """Курсоры next/previous проходят все записи без пропусков."""
+        pages = []
+        page = self.paginator().get_page(None)
+        while True:
+            pages.append([post.pk for post in page])
+            if not page.has_next():
+                break
+            page = self.paginator().get_page(page.next_cursor)
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertFalse(self.paginator().get_page(None).has_previous())
+
+        previous = self.paginator().get_page(page.previous_cursor)
+        self.assertEqual([post.pk for post in previous], pages[-2])
+        self.assertTrue(previous.has_next())
+
+    def test_count_is_lazy(self):
+        """Общее число записей не считается, пока его не запросили."""
+        paginator = self.paginator()
+        with self.assertNumQueries(1):
+            paginator.get_page(None)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, POSTS_COUNT)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        self.assertIsNone(decode_cursor('не курсор'))
+        page = self.paginator().get_page(encode_cursor(['x', 'y']))
+        self.assertEqual([post.pk for post in page], self.expected[:PER_PAGE])
+
+    def test_page_api_does_not_crash(self):
+        """Общий API Page не падает: номеров нет, края - EmptyPage."""
+        paginator = self.paginator()
+        page = paginator.page(1)
+        self.assertEqual([post.pk for post in page], self.expected[:PER_PAGE])
+        with self.assertRaises(InvalidPage):
+            paginator.page(2)
+        self.assertIsNone(page.next_page_number())
+        self.assertIsNone(page.start_index())
+        self.assertIsNone(page.end_index())
+        with self.assertRaises(EmptyPage):
+            page.previous_page_number()
+
+    def test_index_follows_cursor(self):
+        """Ссылка «Следующая» на главной ведёт по курсору."""
+        response = self.client.get(reverse('posts:index'))
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(
+            reverse('posts:index'), {'cursor': cursor})
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            self.expected[10:20])
+
+
+class ElidedPageRangeTests(SimpleTestCase):
+    def test_short_range_is_complete(self):
+        """Немного страниц - выводятся все."""
+        self.assertEqual(list(elided_page_range(3, 5)), [1, 2, 3, 4, 5])
+
+    def test_long_range_is_elided(self):
+        """Число ссылок не зависит от числа страниц."""
+        self.assertEqual(
+            list(elided_page_range(50000, 100000)),
+            [1, ELLIPSIS, 49998, 49999, 50000, 50001, 50002,
+             ELLIPSIS, 100000])
+        self.assertEqual(
+            list(elided_page_range(1, 100000)),
+            [1, 2, 3, ELLIPSIS, 100000])
+        self.assertEqual(
+            list(elided_page_range(100000, 100000)),
+            [1, ELLIPSIS, 99998, 99999, 100000])
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from ..queries import QueryBudgetExceeded, QueryRecorder, query_shape
+
+User = get_user_model()
+INDEX = 'posts:index'
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_in_lists_have_one_shape(self):
+        """Списки IN разной длины дают одну форму запроса."""
+        self.assertEqual(
+            query_shape('SELECT 1 WHERE id IN (%s, %s)'),
+            query_shape('SELECT 1 WHERE id IN (%s, %s, %s)'))
+
+    def test_repeated_queries_are_reported(self):
+        """Одинаковые запросы в цикле определяются как N+1."""
+        with QueryRecorder() as recorder:
+            for _ in range(4):
+                Group.objects.get(pk=self.group.pk)
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(list(recorder.repeated(limit=3).values()), [4])
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_response_reports_queries(self):
+        """В ответе есть число запросов к БД."""
+        response = self.client.get(reverse(INDEX))
+        self.assertEqual(
+            response['X-DB-Queries'],
+            str(response.wsgi_request.query_recorder.count))
+
+    def test_headers_hidden_without_debug(self):
+        """Без DEBUG число запросов и время БД клиентам не видны."""
+        response = self.client.get(reverse(INDEX))
+        self.assertFalse(response.has_header('X-DB-Queries'))
+        self.assertFalse(response.has_header('X-DB-Time'))
+
+    @override_settings(QUERY_BUDGET_RAISE=True, QUERY_BUDGETS={INDEX: 1})
+    def test_exceeded_budget_raises(self):
+        """Превышение бюджета при QUERY_BUDGET_RAISE - исключение."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse(INDEX))
@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from ..sqlite_cache import SQLiteCache
+
+
+def increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.create()
+
+    def create(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_values_round_trip(self):
+        values = {'int': 5, 'flag': True, 'dict': {'a': [1, 2]}, 'text': 'т'}
+        self.cache.set_many(values)
+        self.assertEqual(self.cache.get_many([*values, 'missing']), values)
+        self.assertIs(self.cache.get('flag'), True)
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.cache.delete_many(['int', 'dict'])
+        self.assertFalse(self.cache.has_key('int'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('text'))
+
+    def test_shared_between_instances(self):
+        """Записи видны другому экземпляру, как другому воркеру."""
+        self.cache.set('key', 'value')
+        self.assertEqual(self.create().get('key'), 'value')
+
+    def test_timeouts(self):
+        self.cache.set('short', 1, 10)
+        self.cache.set('forever', 1, None)
+        self.assertFalse(self.cache.add('short', 2))
+        with mock.patch('core.sqlite_cache.time.time',
+                        return_value=2e10):
+            self.assertIsNone(self.cache.get('short'))
+            self.assertEqual(self.cache.get('forever'), 1)
+            self.assertTrue(self.cache.add('short', 2))
+            with self.assertRaises(ValueError):
+                self.cache.incr('missing')
+        self.assertTrue(self.cache.touch('forever', 10))
+
+    def test_incr(self):
+        self.cache.set('number', 1)
+        self.assertEqual(self.cache.incr('number', 5), 6)
+        self.assertEqual(self.cache.decr('number'), 5)
+        self.cache.set('float', 1.5)
+        self.assertEqual(self.cache.incr('float'), 2.5)
+        self.cache.set('big', 2 ** 63 - 1)
+        self.assertEqual(self.cache.incr('big'), 2 ** 63)
+
+    def test_incr_atomic_between_processes(self):
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=increment, args=(self.location, 200))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 800)
+
+    def test_least_recently_read_evicted(self):
+        cache = self.create(MAX_ENTRIES=10, CULL_FREQUENCY=5, CULL_EVERY=1)
+        with mock.patch('core.sqlite_cache.time.time') as now:
+            for number in range(10):
+                now.return_value = 1000 + number
+                cache.set(number, number, None)
+            now.return_value = 2000
+            cache.get(0)
+            cache.set('new', 'value', None)
+        left = cache.get_many([*range(10), 'new'])
+        # Лишняя запись и ещё пятая часть лимита - давно не читанные
+        self.assertEqual(sorted(left, key=str), [0, 4, 5, 6, 7, 8, 9, 'new'])
+
+    def test_read_does_not_wait_for_writer(self):
+        """Чтение не ждёт блокировку записи ради отметки доступа."""
+        with mock.patch('core.sqlite_cache.time.time', return_value=1000):
+            self.cache.set('key', 'value', None)
+        writer = self.create()
+        with writer._write():
+            start = time.monotonic()
+            self.assertEqual(self.cache.get('key'), 'value')
+            self.assertLess(time.monotonic() - start, 1)
+
+    def test_tests_use_own_cache_file(self):
+        """Тесты не трогают общий файл кэша сервера."""
+        cache = caches['default']
+        self.assertIsInstance(cache, SQLiteCache)
+        self.assertFalse(cache._path.startswith(settings.BASE_DIR))
+
+    def test_benchmark_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'result.json')
+            call_command(
+                'benchmark_cache', operations=5, keys=30, output=output,
+                stdout=StringIO())
+            with open(output) as file:
+                self.assertIn('"sqlite"', file.read())
@@ -0,0 +1,65 @@
+"""Обработчики загрузки, считающие SHA-256 файла по мере приёма.
+
+Замена стандартных обработчиков в ``settings.FILE_UPLOAD_HANDLERS``.
+Готовый digest сохраняется в ``content_digest`` загруженного файла,
+и хранилище по содержимому (core.storage) не читает файл ещё раз.
+
+Большие файлы пишутся во временный файл на диске, а не в память.
+Всё, что сверх ``settings.UPLOAD_MAX_SIZE``, отбрасывается по мере
+приёма; у такого файла ``too_large`` истинно, и форма отклоняет его
+с понятной ошибкой (см. core.images.BoundedImageField).
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import (MemoryFileUploadHandler,
+                                             TemporaryFileUploadHandler)
+
+
+class DigestMixin:
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        rest = super().receive_data_chunk(raw_data, start)
+        if rest is None:
+            # Кусок принят этим обработчиком, а не передан следующему
+            self.hasher.update(raw_data)
+        return rest
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.content_digest = self.hasher.hexdigest()
+        return file
+
+
+class SizeLimitMixin:
+    def new_file(self, *args, **kwargs):
+        self.received = 0
+        self.too_large = False
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.UPLOAD_MAX_SIZE:
+            # Остаток тела запроса читается, но не пишется на диск
+            self.too_large = True
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.too_large = self.too_large
+        return file
+
+
+class DigestMemoryFileUploadHandler(DigestMixin, MemoryFileUploadHandler):
+    pass
+
+
+class DigestTemporaryFileUploadHandler(SizeLimitMixin, DigestMixin,
+                                       TemporaryFileUploadHandler):
+    pass
@@ -0,0 +1,279 @@
+"""Перенос групп, постов и комментариев в файлы NDJSON/CSV и обратно.
+
+Каждая запись - словарь с полем ``model`` (``group``, ``post``,
+``comment``). Авторы указываются по имени пользователя, группы - по slug,
+комментарий ссылается на ``id`` поста. Пост с ``id`` сохраняется под
+тем же ключом, поэтому выгрузка одного сайта загружается в другой
+вместе с комментариями.
+
+Файлы читаются и пишутся построчно, память не зависит от их размера.
+Позиция сохраняется в файл-чекпоинт после каждой порции, и прерванная
+команда продолжает с неё.
+"""
+import csv
+import json
+import os
+import sys
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .excerpts import make_short_text
+from .models import Comment, Group, Post, User
+
+MODELS = ('group', 'post', 'comment')
+FIELDS = {
+    'group': ('id', 'slug', 'title', 'description'),
+    'post': ('id', 'author', 'group', 'titul', 'text', 'pub_date', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+}
+# Поля выгрузки: имя в файле -> поле values()
+EXPORT_VALUES = {
+    'group': {
+        'id': 'pk', 'slug': 'slug', 'title': 'title',
+        'description': 'description',
+    },
+    'post': {
+        'id': 'pk', 'author': 'author__username', 'group': 'group__slug',
+        'titul': 'titul', 'text': 'text', 'pub_date': 'pub_date',
+        'image': 'image',
+    },
+    'comment': {
+        'id': 'pk', 'post': 'post_id', 'author': 'author__username',
+        'text': 'text', 'created': 'created',
+    },
+}
+QUERYSETS = {
+    'group': Group.objects.all,
+    'post': Post.objects.all,
+    'comment': Comment.objects.all,
+}
+
+
+class ArchiveError(Exception):
+    """Запись архива нельзя загрузить."""
+
+
+class Checkpoint:
+    """Позиция в файле, сохраняемая атомарной заменой."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, state):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(state, file)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def detect_format(path, chosen=None):
+    if chosen:
+        return chosen
+    return 'csv' if path.endswith('.csv') else 'ndjson'
+
+
+def read_records(file, file_format, model=None):
+    """Записи файла по одной; для CSV модель задаётся ``model``."""
+    if file_format == 'csv':
+        if model is None:
+            raise ArchiveError('Для CSV укажите модель записей')
+        for row in csv.DictReader(file):
+            row = {key: value for key, value in row.items() if value != ''}
+            row.setdefault('model', model)
+            yield row
+        return
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            raise ArchiveError(f'Строка {number}: {error}')
+        if model:
+            record.setdefault('model', model)
+        yield record
+
+
+def batches(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _date(value):
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ArchiveError(f'Неверная дата: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _users(names):
+    """Пользователи по именам; недостающие создаются без пароля."""
+    found = dict(User.objects.filter(
+        username__in=names).values_list('username', 'pk'))
+    missing = set(names) - set(found)
+    if missing:
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=name, password=password) for name in missing],
+            ignore_conflicts=True)
+        found.update(User.objects.filter(
+            username__in=missing).values_list('username', 'pk'))
+    return found
+
+
+def _groups(slugs):
+    found = dict(Group.objects.filter(
+        slug__in=slugs).values_list('slug', 'pk'))
+    missing = set(slugs) - set(found)
+    if missing:
+        Group.objects.bulk_create(
+            [Group(slug=slug, title=slug, description='')
+             for slug in missing],
+            ignore_conflicts=True)
+        found.update(Group.objects.filter(
+            slug__in=missing).values_list('slug', 'pk'))
+    return found
+
+
+def _require(record, *fields):
+    for field in fields:
+        if not record.get(field):
+            raise ArchiveError(
+                f'{record.get("model")}: нет поля {field}: {record}')
+
+
+def _group(record):
+    _require(record, 'slug', 'title')
+    return Group(
+        pk=record.get('id'),
+        slug=record['slug'],
+        title=record['title'],
+        description=record.get('description', ''),
+    )
+
+
+def _post(record, authors, groups):
+    _require(record, 'author', 'text')
+    return Post(
+        pk=record.get('id'),
+        author_id=authors[record['author']],
+        group_id=groups.get(record.get('group')),
+        titul=record.get('titul', '')[:50],
+        text=record['text'],
+        short_text=make_short_text(record['text']),
+        pub_date=_date(record.get('pub_date')),
+        image=record.get('image', ''),
+    )
+
+
+def _comment(record, authors):
+    _require(record, 'post', 'author', 'text')
+    return Comment(
+        pk=record.get('id'),
+        post_id=int(record['post']),
+        author_id=authors[record['author']],
+        text=record['text'],
+        created=_date(record.get('created')),
+    )
+
+
+def save_batch(batch):
+    """Сохраняет порцию записей через ``bulk_create``.
+
+    Группы порции сохраняются первыми, чтобы посты той же порции
+    ссылались на них, а не создавали пустые группы с тем же slug.
+    """
+    by_model = {model: [] for model in MODELS}
+    for record in batch:
+        model = record.get('model')
+        if model not in by_model:
+            raise ArchiveError(f'Неизвестная модель: {model}')
+        by_model[model].append(record)
+    Group.objects.bulk_create(
+        [_group(record) for record in by_model['group']])
+    authors = _users({
+        record['author'] for record in batch if record.get('author')})
+    groups = _groups({
+        record['group'] for record in by_model['post']
+        if record.get('group')})
+    Post.objects.bulk_create(
+        [_post(record, authors, groups) for record in by_model['post']])
+    Comment.objects.bulk_create(
+        [_comment(record, authors) for record in by_model['comment']])
+
+
+def export_rows(model, after=0, chunk_size=2000):
+    """Записи модели по возрастанию pk, начиная после ``after``."""
+    fields = EXPORT_VALUES[model]
+    rows = (
+        QUERYSETS[model]().filter(pk__gt=after).order_by('pk')
+        .values_list(*fields.values()).iterator(chunk_size=chunk_size)
+    )
+    for values in rows:
+        record = {'model': model}
+        for name, value in zip(fields, values):
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            record[name] = value
+        yield record
+
+
+class RecordWriter:
+    """Пишет записи в NDJSON или CSV."""
+
+    def __init__(self, file, file_format, model=None, header=True):
+        self.file = file
+        self.csv = None
+        if file_format == 'csv':
+            if model is None:
+                raise ArchiveError('Для CSV укажите модель записей')
+            self.csv = csv.DictWriter(
+                file, fieldnames=FIELDS[model], extrasaction='ignore')
+            if header:
+                self.csv.writeheader()
+
+    def write(self, record):
+        if self.csv:
+            self.csv.writerow({
+                key: '' if value is None else value
+                for key, value in record.items()
+            })
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def open_output(path, offset=None):
+    """Файл выгрузки; при продолжении - обрезанный до ``offset``.
+
+    Всё, что было записано после последнего чекпоинта, отбрасывается,
+    иначе эти записи повторились бы.
+    """
+    if path in (None, '-'):
+        return sys.stdout
+    if offset is None:
+        return open(path, 'w', newline='', encoding='utf-8')
+    file = open(path, 'a', newline='', encoding='utf-8')
+    file.truncate(offset)
+    return file
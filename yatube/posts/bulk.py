@@ -0,0 +1,43 @@
+"""Массовая загрузка данных в обход сигналов.
+
+``bulk_create`` не шлёт ``post_save`` и не вызывает ``Post.save``,
+поэтому после загрузки анонсы, счётчики, ленты, поисковый индекс,
+рейтинг популярности и ссылки на картинки пересчитываются функцией
+``rebuild_derived``.
+"""
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from . import counters, excerpts, feed, images, search, trending
+from .models import Post
+
+
+@contextmanager
+def explicit_dates(*models):
+    """Позволяет задать поля ``auto_now_add`` при ``bulk_create``."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def rebuild_derived():
+    """Пересчитывает всё, что обычно поддерживают сигналы."""
+    excerpts.backfill(Post.objects.all())
+    # Ленты читают счётчики подписчиков, поэтому счётчики первыми
+    counters.rebuild()
+    feed.rebuild()
+    search.rebuild()
+    trending.rebuild()
+    images.rebuild()
+    cache.clear()
@@ -0,0 +1,55 @@
+"""Денормализованные счётчики постов, подписок и комментариев.
+
+Значения меняются атомарными UPDATE с F-выражениями из сигналов
+моделей, шаблоны читают готовые числа вместо COUNT(*).
+Разошедшиеся значения чинит команда ``rebuild_counters``.
+"""
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserCounter
+
+
+def _bump(queryset, field, delta):
+    if delta < 0:
+        # Разошедшийся счётчик не уводим ниже нуля
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def bump_user(user_id, field, delta):
+    counter = UserCounter.objects.filter(user_id=user_id)
+    if not _bump(counter, field, delta) and delta > 0:
+        # Строки ещё нет: пользователь создан в обход сигналов
+        UserCounter.objects.get_or_create(user_id=user_id)
+        _bump(counter, field, delta)
+
+
+def bump_post(post_id, delta):
+    _bump(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+@transaction.atomic
+def rebuild():
+    """Пересчитывает все счётчики по данным таблиц."""
+    missing = User.objects.filter(counters__isnull=True).values_list(
+        'pk', flat=True)
+    UserCounter.objects.bulk_create(
+        [UserCounter(user_id=user_id) for user_id in missing],
+        batch_size=500,
+    )
+    UserCounter.objects.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    Post.objects.update(comments_count=_count(Comment.objects.all(), 'post'))
@@ -0,0 +1,88 @@
+"""События о новых постах для потока SSE (``core.events``).
+
+Подписаться можно на все посты (``?scope=posts``), на группу
+(``?scope=group&slug=<slug>``) или на авторов своих подписок
+(``?scope=follow``, нужен вход на сайт).
+"""
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.parse import parse_qs
+
+from core.events import hub
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY
+from django.db import connections, transaction
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+
+from .models import Follow, Group, User
+
+
+def post_channels(post):
+    channels = ['posts', f'author:{post.author_id}']
+    if post.group_id:
+        channels.append(f'group:{post.group.slug}')
+    return channels
+
+
+def publish_post(post):
+    hub.publish(post_channels(post), {
+        'id': post.pk,
+        'type': 'post',
+        'data': {
+            'id': post.pk,
+            'author': post.author.username,
+            'group': post.group.slug if post.group_id else None,
+            'url': reverse('posts:post_detail', args=(post.pk,)),
+        },
+    })
+
+
+def announce(post):
+    """Публикует пост подписчикам после фиксации транзакции."""
+    transaction.on_commit(lambda: publish_post(post))
+
+
+def _session_user(scope):
+    headers = dict(scope.get('headers', ()))
+    cookie = SimpleCookie(headers.get(b'cookie', b'').decode('latin-1'))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore(morsel.value)
+    user = User.objects.filter(
+        pk=session.get(SESSION_KEY), is_active=True).first()
+    if user is None or not constant_time_compare(
+            session.get(HASH_SESSION_KEY, ''),
+            user.get_session_auth_hash()):
+        return None
+    return user
+
+
+def resolve_channels(scope):
+    """Каналы подписки по запросу потока; None - доступ запрещён."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    kind = query.get('scope', ['posts'])[0]
+    try:
+        if kind == 'posts':
+            return ['posts']
+        if kind == 'group':
+            slug = query.get('slug', [''])[0]
+            if Group.objects.filter(slug=slug).exists():
+                return [f'group:{slug}']
+            return None
+        if kind == 'follow':
+            user = _session_user(scope)
+            if user is None:
+                return None
+            return [
+                f'author:{author_id}'
+                for author_id in Follow.objects.filter(
+                    user=user).values_list('author_id', flat=True)
+            ]
+        return None
+    finally:
+        # Вызывается в пуле потоков ASGI-сервера, соединение не нужно
+        # держать до следующего подключения
+        connections.close_all()
@@ -0,0 +1,32 @@
+"""Анонс поста для списков.
+
+Анонс считается при сохранении поста и хранится в ``Post.short_text``:
+списки выбирают его вместо всего текста поста.
+"""
+
+
+def make_short_text(text):
+    index = text.find('.')
+    if index == -1:
+        # Точка не найдена, возвращаем первые 100 символов
+        return text[:100] + '...Продолжение следует'
+    # Возвращаем текст до точки
+    return text[:index + 1].strip() + '  Продолжение следует...'
+
+
+def backfill(posts, batch_size=1000):
+    """Заполняет пустые анонсы порциями по возрастанию pk.
+
+    Годится и для исторической модели в миграции.
+    """
+    posts = posts.filter(short_text='').only('pk', 'text').order_by('pk')
+    last = total = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last)[:batch_size])
+        if not batch:
+            return total
+        for post in batch:
+            post.short_text = make_short_text(post.text)
+        posts.model._default_manager.bulk_update(batch, ['short_text'])
+        last = batch[-1].pk
+        total += len(batch)
@@ -0,0 +1,184 @@
+"""Материализованная лента подписок (fan-out-on-write).
+
+Новый пост раскладывается по лентам подписчиков автора записями
+``FeedEntry``, поэтому чтение ленты - один проход по индексу
+``(user, pub_date)``. Посты авторов с большим числом подписчиков
+не раскладываются, а подмешиваются при чтении (fan-out-on-read).
+
+Режим автора хранится в ``UserCounter.celebrity`` и меняется
+с гистерезисом: подмешивание включается на ``FEED_FANOUT_LIMIT``
+подписчиках, а выключается ниже ``FEED_FANOUT_RESUME_LIMIT``, чтобы
+подписка и отписка на пороге не переключали его раз за разом.
+При выключении последние ``FEED_BACKFILL_POSTS`` постов автора
+раскладываются по лентам подписчиков в фоновом потоке после коммита,
+иначе они пропали бы из лент вместе с подмешиванием.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .models import FeedEntry, Follow, Post, UserCounter
+
+logger = logging.getLogger(__name__)
+BATCH_SIZE = 500
+_executor = None
+
+
+def _bulk_add(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def is_celebrity(author_id):
+    """Автор, посты которого не раскладываются по лентам."""
+    return UserCounter.objects.filter(
+        user_id=author_id, celebrity=True).exists()
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_add([
+        FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers
+    ])
+
+
+def _backfill(user_id, author_id):
+    posts = Post.objects.filter(
+        author_id=author_id).values_list('pk', 'pub_date')
+    entries = []
+    for post_id, pub_date in posts.iterator():
+        entries.append(FeedEntry(
+            user_id=user_id, post_id=post_id, pub_date=pub_date))
+        if len(entries) == BATCH_SIZE:
+            _bulk_add(entries)
+            entries = []
+    _bulk_add(entries)
+
+
+def backfill(follow):
+    """Заполняет ленту подписчика постами автора после подписки."""
+    if is_celebrity(follow.author_id):
+        return
+    _backfill(follow.user_id, follow.author_id)
+
+
+def author_gained_follower(author_id):
+    """Включает подмешивание постов автора, достигшего порога."""
+    UserCounter.objects.filter(
+        user_id=author_id, celebrity=False,
+        followers_count__gte=settings.FEED_FANOUT_LIMIT,
+    ).update(celebrity=True)
+
+
+def author_lost_follower(author_id):
+    """Возвращает раскладку постов автора, опустившегося ниже порога.
+
+    Флаг снимается одним UPDATE, поэтому из одновременных отписок
+    раскладку в фоне ставит только одна. Возвращает True, если
+    раскладка поставлена.
+    """
+    resumed = UserCounter.objects.filter(
+        user_id=author_id, celebrity=True,
+        followers_count__lt=settings.FEED_FANOUT_RESUME_LIMIT,
+    ).update(celebrity=False)
+    if not resumed:
+        return False
+    transaction.on_commit(
+        lambda: _get_executor().submit(_backfill_in_background, author_id))
+    return True
+
+
+def backfill_recent(author_id):
+    """Добавляет последние посты автора в ленты его подписчиков."""
+    posts = list(
+        Post.objects.filter(author_id=author_id)
+        .order_by('-pub_date').values_list('pk', 'pub_date')
+        [:settings.FEED_BACKFILL_POSTS])
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    entries = []
+    for user_id in followers.iterator():
+        entries.extend(
+            FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts)
+        if len(entries) >= BATCH_SIZE:
+            _bulk_add(entries)
+            entries = []
+    _bulk_add(entries)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.FEED_BACKFILL_WORKERS,
+            thread_name_prefix='feed-backfill',
+        )
+    return _executor
+
+
+def _backfill_in_background(author_id):
+    try:
+        backfill_recent(author_id)
+    except Exception:
+        logger.exception('Не удалось разложить посты автора %s', author_id)
+    finally:
+        connections.close_all()
+
+
+def remove(follow):
+    """Убирает посты автора из ленты после отписки."""
+    FeedEntry.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id).delete()
+
+
+def celebrity_authors(user):
+    """Авторы из подписок, чьи посты читаются напрямую из Post."""
+    return Follow.objects.filter(
+        user=user,
+        author__counters__celebrity=True,
+    ).values_list('author_id', flat=True)
+
+
+def feed_for(user):
+    """Записи ленты подписок и поля, по которым они упорядочены.
+
+    Без популярных авторов листаются сами записи FeedEntry по индексу
+    ``(user, pub_date, post)`` без сортировки; иначе - посты, собранные
+    из ленты и постов популярных авторов. Посты страницы берутся
+    из кэша функцией ``loaders.load_page``.
+    """
+    celebrities = list(celebrity_authors(user))
+    if not celebrities:
+        lookups = ('pub_date', 'post_id')
+        entries = FeedEntry.objects.filter(user=user)
+        return entries.order_by('-pub_date', '-post_id'), lookups
+    entries = FeedEntry.objects.filter(user=user).values('post_id')
+    posts = Post.objects.filter(
+        Q(pk__in=entries) | Q(author_id__in=celebrities))
+    return posts.order_by('-pub_date', '-pk'), ('pub_date', 'pk')
+
+
+def rebuild():
+    """Пересобирает все ленты по текущим подпискам.
+
+    Режим авторов сверяется с числом подписчиков; между порогами
+    остаётся прежним.
+    """
+    UserCounter.objects.filter(
+        followers_count__gte=settings.FEED_FANOUT_LIMIT,
+    ).update(celebrity=True)
+    UserCounter.objects.filter(
+        followers_count__lt=settings.FEED_FANOUT_RESUME_LIMIT,
+    ).update(celebrity=False)
+    FeedEntry.objects.all().delete()
+    for follow in Follow.objects.iterator():
+        backfill(follow)
@@ -1,3 +1,4 @@
+from core.images import BoundedImageField
 from django import forms
 
 from .models import Post, Comment
@@ -7,6 +8,7 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('titul', 'text', 'group', 'image')
+        field_classes = {'image': BoundedImageField}
         labels = {
             "titul": ("Ключевое слово"),
             "text": ("Текстовое поле"),
@@ -0,0 +1,162 @@
+"""Подсчёт ссылок постов на файлы картинок.
+
+Одинаковые картинки хранятся одним файлом (core.storage), поэтому
+файл удаляется, только когда на него не ссылается ни один пост.
+Число ссылок хранится в ``ImageBlob`` и меняется сигналами сохранения
+и удаления постов; после массовой загрузки его пересчитывает
+``rebuild``. Файлы, сохранённые до хранилища по содержимому,
+не учитываются и не удаляются.
+
+Новая картинка поста после коммита перекодируется без метаданных
+в отдельном процессе (``schedule_cleanup``): Pillow не занимает
+память и GIL веб-воркера. Очищенный файл получает свой digest,
+пост переключается на него, исходник освобождается.
+"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core.images import strip_metadata
+from core.storage import is_addressed
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import Count, F
+from sorl.thumbnail import default
+
+from .models import ImageBlob, Post
+from .thumbnails import generate, source, storage
+
+logger = logging.getLogger(__name__)
+
+
+def _size(name):
+    try:
+        return storage.size(name)
+    except OSError:
+        return 0
+
+
+def acquire(name):
+    """Учитывает новую ссылку поста на файл."""
+    if not is_addressed(name):
+        return
+    blob, created = ImageBlob.objects.get_or_create(
+        name=name, defaults={'size': _size(name), 'references': 1})
+    if not created:
+        ImageBlob.objects.filter(pk=blob.pk).update(
+            references=F('references') + 1)
+
+
+def release(name):
+    """Снимает ссылку; файл без ссылок удаляется после коммита."""
+    if not is_addressed(name):
+        return
+    ImageBlob.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1)
+    transaction.on_commit(lambda: purge(name))
+
+
+def purge(name):
+    """Удаляет файл и его миниатюры, если ссылок на него не осталось."""
+    deleted, _ = ImageBlob.objects.filter(name=name, references=0).delete()
+    if deleted:
+        default.kvstore.delete(source(name))
+        storage.delete(name)
+    return bool(deleted)
+
+
+def rebuild():
+    """Пересчитывает ссылки по постам и удаляет файлы без ссылок."""
+    counts = dict(
+        Post.objects.exclude(image='').values_list('image')
+        .annotate(total=Count('id')).order_by())
+    counts = {name: total for name, total in counts.items()
+              if is_addressed(name)}
+    blobs = {blob.name: blob for blob in ImageBlob.objects.all()}
+    for blob in blobs.values():
+        blob.references = counts.get(blob.name, 0)
+    ImageBlob.objects.bulk_update(
+        blobs.values(), ['references'], batch_size=1000)
+    ImageBlob.objects.bulk_create([
+        ImageBlob(name=name, size=_size(name), references=total)
+        for name, total in counts.items() if name not in blobs
+    ], batch_size=1000)
+    for blob in blobs.values():
+        if not blob.references:
+            purge(blob.name)
+
+
+_executor = None
+_processes = None
+
+
+def _get_executor():
+    global _executor, _processes
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_CLEANUP_PROCESSES,
+            thread_name_prefix='image-cleanup',
+        )
+        # spawn, а не fork: копировать многопоточный веб-процесс опасно
+        _processes = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_CLEANUP_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+def schedule_cleanup(post):
+    """Ставит очистку новой картинки поста в очередь после коммита.
+
+    Возвращает False, если очищать нечего.
+    """
+    name = post.image.name
+    if (not settings.IMAGE_CLEANUP or not name
+            or getattr(post, '_image_cleaned', False)
+            or name == getattr(post, '_previous_image', None)):
+        return False
+    pk = post.pk
+    transaction.on_commit(
+        lambda: _get_executor().submit(_clean_in_background, pk, name))
+    return True
+
+
+def _clean_in_background(pk, name):
+    try:
+        clean(pk, name, _processes.submit)
+    except Exception:
+        logger.exception('Не удалось очистить картинку %s', name)
+    finally:
+        connections.close_all()
+
+
+def clean(pk, name, submit):
+    """Заменяет картинку поста очищенной копией.
+
+    ``submit`` запускает ``strip_metadata`` и возвращает future,
+    обычно в пуле процессов.
+    """
+    data = submit(
+        strip_metadata, storage.path(name),
+        settings.UPLOAD_MAX_PIXELS).result()
+    cleaned = name if data is None else storage.save(name, ContentFile(data))
+    if cleaned == name:
+        generate(name)
+        return name
+    with transaction.atomic():
+        post = Post.objects.select_for_update().filter(
+            pk=pk, image=name).first()
+        if post is None:
+            # Пока шла очистка, картинку заменили или пост удалили
+            transaction.on_commit(lambda: _drop_unused(cleaned))
+            return None
+        post.image.name = cleaned
+        post._image_cleaned = True
+        post.save(update_fields=['image'])
+    return cleaned
+
+
+def _drop_unused(name):
+    if not ImageBlob.objects.filter(name=name).exists():
+        storage.delete(name)
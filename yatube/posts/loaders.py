@@ -0,0 +1,45 @@
+"""Посты списков с авторами и группами из кэша (см. core.loader).
+
+Списки выбирают из БД только ключи страницы, а сами посты, их авторы
+и группы берутся из кэша пачками. Кэш сбрасывают сигналы сохранения
+постов, комментариев (число комментариев), пользователей и групп.
+"""
+from core.loader import CachedLoader
+
+from .models import FeedEntry, Group, Post, User
+
+posts = CachedLoader('post', Post.objects.all())
+# Для главной: там выводится анонс, а не полный текст
+post_summaries = CachedLoader('post_summary', Post.objects.defer('text'))
+authors = CachedLoader(
+    'author', User.objects.only('username', 'first_name', 'last_name'))
+groups = CachedLoader('group', Group.objects.all())
+
+
+def attach_relations(post_list):
+    """Проставляет постам авторов и группы из кэша."""
+    users = authors.load_many(post.author_id for post in post_list)
+    found_groups = groups.load_many(
+        post.group_id for post in post_list if post.group_id)
+    for post in post_list:
+        post.author = users[post.author_id]
+        post.group = found_groups.get(post.group_id)
+    return post_list
+
+
+def load_page(page_obj, loader=posts):
+    """Заменяет строки страницы (посты или записи ленты) постами из кэша."""
+    ids = [
+        row.post_id if isinstance(row, FeedEntry) else row.pk
+        for row in page_obj.object_list
+    ]
+    found = loader.load_many(ids)
+    # Удалённый между запросами пост пропадает со страницы
+    page_obj.object_list = attach_relations(
+        [found[pk] for pk in ids if pk in found])
+    return page_obj
+
+
+def forget_post(post_id):
+    posts.forget(post_id)
+    post_summaries.forget(post_id)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.excerpts import backfill
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет анонсы постов, сохранённых в обход Post.save'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать анонсы всех постов, а не только пустые')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            Post.objects.update(short_text='')
+        total = backfill(Post.objects.all(), options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Заполнено анонсов: {total}'))
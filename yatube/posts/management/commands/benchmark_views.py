@@ -0,0 +1,155 @@
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from core import benchmark
+from posts.models import Comment, Follow, Group, Post, User
+from posts.urls import app_name, urlpatterns
+
+
+def pick_arguments():
+    """Аргументы адресов: самые тяжёлые страницы набора данных."""
+    user = (
+        User.objects.filter(posts__isnull=False)
+        .order_by('-counters__following_count').first()
+    )
+    if user is None:
+        raise CommandError(
+            'Нет данных, сначала выполните generate_dataset')
+    followed = Follow.objects.filter(user=user).values('author_id')
+    star = (
+        User.objects.exclude(pk=user.pk).exclude(pk__in=followed)
+        .order_by('-counters__followers_count').first()
+    ) or user
+    group = Group.objects.annotate(
+        total=Count('posts')).order_by('-total').first()
+    post = (
+        Post.objects.order_by('-comments_count').first()
+        if Comment.objects.exists() else user.posts.first()
+    )
+    own_post = user.posts.first()
+    return user, {
+        'index': {},
+        'trending': {},
+        'group_list': {'slug': group.slug} if group else None,
+        'profile': {'username': star.username},
+        'post_detail': {'post_id': post.pk},
+        'post_create': {},
+        'post_edit': {'post_id': own_post.pk},
+        'comment_list': {'post_id': post.pk},
+        'add_comment': {'post_id': post.pk},
+        'follow_index': {},
+        'profile_follow': {'username': star.username},
+        'profile_unfollow': {'username': star.username},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа всех адресов posts.urls (p50/p95/p99), '
+        'число SQL-запросов и память; результат сохраняется в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Без входа на сайт: страницы отдаются из кэша')
+        parser.add_argument(
+            '--output', default=None,
+            help='Файл результата (по умолчанию benchmark-<дата>.json)')
+        parser.add_argument(
+            '--compare', default=None,
+            help='JSON прошлого прогона для поиска регрессий')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост p95, доля (0.2 = 20%%)')
+
+    def collect_urls(self, arguments):
+        urls = {}
+        for pattern in urlpatterns:
+            kwargs = arguments.get(pattern.name)
+            if kwargs is None:
+                self.stderr.write(f'{pattern.name}: нет данных, пропущен')
+                continue
+            urls[pattern.name] = reverse(
+                f'{app_name}:{pattern.name}', kwargs=kwargs)
+        return urls
+
+    def measure(self, client, urls, warmup, iterations):
+        """Замеры каждого адреса: процентили, SQL-запросы и память."""
+        # Адреса обходятся по кругу, чтобы подписка и отписка чередовались
+        for _ in range(warmup):
+            for url in urls.values():
+                client.get(url)
+        samples = {name: [] for name in urls}
+        queries = {}
+        statuses = {}
+        for _ in range(iterations):
+            for name, url in urls.items():
+                elapsed, count, status = benchmark.time_request(client, url)
+                samples[name].append(elapsed)
+                queries[name] = max(queries.get(name, 0), count)
+                statuses[name] = status
+
+        views = {}
+        for name, url in urls.items():
+            views[name] = {
+                'url': url,
+                'status': statuses[name],
+                **benchmark.summarize(samples[name]),
+                'queries': queries[name],
+                'memory_kib': benchmark.peak_memory(client, url),
+            }
+            self.stdout.write(
+                '{:<18} p50 {p50:>8} p95 {p95:>8} p99 {p99:>8} мс, '
+                'запросов {queries:>3}, {memory_kib} КиБ'.format(
+                    name, **views[name]))
+        return views
+
+    def check_regressions(self, result, baseline_path, threshold):
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+        regressions = benchmark.compare(result, baseline, threshold)
+        if regressions:
+            raise CommandError(
+                'Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def handle(self, *args, **options):
+        user, arguments = pick_arguments()
+        # Адрес не из INTERNAL_IPS: иначе debug toolbar попадёт в замеры
+        client = Client(REMOTE_ADDR='192.0.2.1')
+        if not options['anonymous']:
+            client.force_login(user)
+        urls = self.collect_urls(arguments)
+        views = self.measure(
+            client, urls, options['warmup'], options['iterations'])
+
+        result = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': benchmark.environment(),
+            'iterations': options['iterations'],
+            'anonymous': options['anonymous'],
+            'page_size': settings.NUMBER_ENTRIES_FOR_PAGE,
+            'dataset': {
+                model.__name__: model.objects.count()
+                for model in (User, Group, Post, Comment, Follow)
+            },
+            'views': views,
+        }
+        output = options['output'] or 'benchmark-{}.json'.format(
+            datetime.now().strftime('%Y%m%d-%H%M%S'))
+        with open(output, 'w') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Результат: {output}'))
+
+        if options['compare']:
+            self.check_regressions(
+                result, options['compare'], options['threshold'])
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+
+from core.storage import is_addressed
+from posts import images
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки, загруженные до хранилища по содержимому, '
+        'под их digest: одинаковые файлы остаются в одном экземпляре'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Не удалять старые файлы после переноса')
+
+    def handle(self, *args, **options):
+        names = (
+            Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct())
+        targets = set()
+        moved = 0
+        for name in list(names):
+            if is_addressed(name):
+                continue
+            if not images.storage.exists(name):
+                self.stderr.write(f'Нет файла {name}')
+                continue
+            with images.storage.open(name) as file:
+                target = images.storage.save(name, file)
+            Post.objects.filter(image=name).update(image=target)
+            targets.add(target)
+            moved += 1
+            if not options['keep_old']:
+                default.kvstore.delete(images.source(name))
+                images.storage.delete(name)
+        images.rebuild()
+        if moved:
+            # В закэшированных страницах остались старые адреса картинок
+            cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено файлов: {moved}, после объединения '
+            f'одинаковых: {len(targets)}'))
@@ -0,0 +1,79 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты и комментарии в NDJSON или CSV потоком; '
+        'прерванная выгрузка продолжается с чекпоинта'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл результата (по умолчанию stdout)')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default=None,
+            help='Формат файла (по умолчанию по расширению)')
+        parser.add_argument(
+            '--model', choices=archive.MODELS, action='append',
+            help='Что выгружать (по умолчанию всё; для CSV - одна модель)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='Файл позиции (по умолчанию <output>.checkpoint)')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на чекпоинт')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        file_format = archive.detect_format(output, options['format'])
+        models = options['model'] or list(archive.MODELS)
+        if file_format == 'csv' and len(models) != 1:
+            raise CommandError(
+                'В CSV выгружается одна модель, укажите --model')
+        to_file = output != '-'
+        checkpoint = archive.Checkpoint(
+            options['checkpoint'] or f'{output}.checkpoint')
+        if options['restart'] or not to_file:
+            checkpoint.clear()
+        state = checkpoint.load() if to_file else {}
+        resumed = 'offset' in state
+
+        started = time.monotonic()
+        exported = 0
+        file = archive.open_output(output, offset=state.get('offset'))
+        try:
+            writer = archive.RecordWriter(
+                file, file_format, models[0], header=not resumed)
+            for model in models:
+                if state.get('finished', {}).get(model):
+                    continue
+                last = state.get('last', {}).get(model, 0)
+                for record in archive.export_rows(
+                        model, after=last, chunk_size=options['chunk_size']):
+                    writer.write(record)
+                    exported += 1
+                    if to_file and exported % options['chunk_size'] == 0:
+                        state.setdefault('last', {})[model] = record['id']
+                        self.save(checkpoint, state, file)
+                state.setdefault('finished', {})[model] = True
+                if to_file:
+                    self.save(checkpoint, state, file)
+        finally:
+            if to_file:
+                file.close()
+        checkpoint.clear()
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {exported} за {elapsed:.1f} с '
+            f'({exported / max(elapsed, 1e-6):.0f} в секунду)'))
+
+    def save(self, checkpoint, state, file):
+        file.flush()
+        state['offset'] = file.tell()
+        checkpoint.save(state)
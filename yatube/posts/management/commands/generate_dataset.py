@@ -0,0 +1,164 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.bulk import explicit_dates, rebuild_derived
+from posts.excerpts import make_short_text
+from posts.models import Comment, Follow, Group, Post, User
+
+BATCH_SIZE = 5000
+TEXT_POOL_SIZE = 1000
+# Показатель степени распределения Парето: чем меньше, тем сильнее
+# подписчики и комментарии собираются у немногих авторов и постов
+ALPHA = 1.2
+PERIOD = timedelta(days=365)
+
+
+def power_law_weights(rng, count):
+    return [rng.paretovariate(ALPHA) for _ in range(count)]
+
+
+def in_batches(items, size=BATCH_SIZE):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для нагрузочных тестов: '
+        'подписчики и комментарии распределены по степенному закону'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10 ** 6)
+        parser.add_argument('--comments', type=int, default=10 ** 6)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок пользователя')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Один seed - один и тот же набор данных')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        fake = Faker('ru_RU')
+        fake.seed_instance(options['seed'])
+        self.texts = [fake.text() for _ in range(TEXT_POOL_SIZE)]
+        self.now = timezone.now()
+        with transaction.atomic(), explicit_dates(Post, Comment):
+            users = self.create_users(fake, options['users'])
+            groups = self.create_groups(fake, options['groups'])
+            weights = power_law_weights(rng, len(users))
+            self.create_follows(rng, users, weights, options['follows'])
+            posts = self.create_posts(
+                rng, users, weights, groups, options['posts'])
+            self.create_comments(rng, users, posts, options['comments'])
+        self.stdout.write('Пересчёт счётчиков, лент и поискового индекса')
+        rebuild_derived()
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
+
+    def random_date(self, rng):
+        return self.now - PERIOD * rng.random()
+
+    def create_users(self, fake, count):
+        # Один хеш на всех: make_password на каждого занял бы часы
+        password = make_password('benchmark')
+        start = User.objects.count()
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{fake.user_name()}{start + number}',
+                    first_name=fake.first_name(),
+                    last_name=fake.last_name(),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        self.stdout.write(f'Пользователей: {count}')
+        return list(User.objects.values_list('pk', flat=True))
+
+    def create_groups(self, fake, count):
+        start = Group.objects.count()
+        Group.objects.bulk_create(
+            Group(
+                title=fake.catch_phrase()[:200],
+                slug=f'group-{start + number}',
+                description=fake.paragraph(),
+            )
+            for number in range(count)
+        )
+        self.stdout.write(f'Групп: {count}')
+        return list(Group.objects.values_list('pk', flat=True))
+
+    def create_follows(self, rng, users, weights, average):
+        """Подписки на авторов с вероятностью, пропорциональной весу."""
+        total = 0
+        for batch in in_batches(users, 1000):
+            follows = []
+            for user_id in batch:
+                count = min(
+                    len(users) - 1, int(rng.expovariate(1 / average)))
+                authors = set(rng.choices(users, weights, k=count))
+                authors.discard(user_id)
+                follows.extend(
+                    Follow(user_id=user_id, author_id=author_id)
+                    for author_id in authors
+                )
+            Follow.objects.bulk_create(
+                follows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+            total += len(follows)
+        self.stdout.write(f'Подписок: {total}')
+
+    def create_posts(self, rng, users, weights, groups, count):
+        # Популярные авторы и пишут больше
+        authors = iter(rng.choices(users, weights, k=count))
+        for batch in in_batches(range(count)):
+            posts = [
+                Post(
+                    author_id=next(authors),
+                    group_id=(
+                        rng.choice(groups) if rng.random() < 0.5 else None),
+                    titul=rng.choice(self.texts)[:50],
+                    text=rng.choice(self.texts),
+                    pub_date=self.random_date(rng),
+                )
+                for _ in batch
+            ]
+            # bulk_create не вызывает Post.save, анонс задаётся здесь
+            for post in posts:
+                post.short_text = make_short_text(post.text)
+            Post.objects.bulk_create(posts)
+        self.stdout.write(f'Постов: {count}')
+        return list(Post.objects.values_list('pk', 'pub_date'))
+
+    def create_comments(self, rng, users, posts, count):
+        """Комментарии: у немногих постов длинные ветки."""
+        weights = power_law_weights(rng, len(posts))
+        targets = iter(rng.choices(posts, weights, k=count))
+        for batch in in_batches(range(count)):
+            comments = []
+            for _ in batch:
+                post_id, pub_date = next(targets)
+                comments.append(Comment(
+                    post_id=post_id,
+                    author_id=rng.choice(users),
+                    text=rng.choice(self.texts),
+                    created=pub_date + (self.now - pub_date) * rng.random(),
+                ))
+            Comment.objects.bulk_create(comments)
+        self.stdout.write(f'Комментариев: {count}')
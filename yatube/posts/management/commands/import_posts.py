@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+
+from posts import archive
+from posts.bulk import explicit_dates, rebuild_derived
+from posts.models import Comment, Group, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты и комментарии из NDJSON или CSV '
+        'порциями через bulk_create; прерванная загрузка продолжается '
+        'с чекпоинта'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON или CSV')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default=None,
+            help='Формат файла (по умолчанию по расширению)')
+        parser.add_argument(
+            '--model', choices=archive.MODELS, default=None,
+            help='Модель записей без поля model (обязательно для CSV)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--checkpoint', default=None,
+            help='Файл позиции (по умолчанию <path>.checkpoint)')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать сначала, не глядя на чекпоинт')
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и индексы '
+                 '(если следом загружаются ещё файлы)')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = options['path']
+        file_format = archive.detect_format(path, options['format'])
+        checkpoint = archive.Checkpoint(
+            options['checkpoint'] or f'{path}.checkpoint')
+        if options['restart']:
+            checkpoint.clear()
+        done = checkpoint.load().get('records', 0)
+        if done:
+            self.stdout.write(f'Продолжение с записи {done + 1}')
+
+        started = time.monotonic()
+        imported = 0
+        with open(path, newline='', encoding='utf-8') as file:
+            records = archive.read_records(
+                file, file_format, options['model'])
+            # Уже загруженные записи пропускаются без разбора в объекты
+            for _ in range(done):
+                next(records, None)
+            try:
+                for batch in archive.batches(records, options['batch_size']):
+                    self.save(batch)
+                    done += len(batch)
+                    imported += len(batch)
+                    checkpoint.save({'records': done})
+                    self.report(imported, started)
+            except (archive.ArchiveError, DatabaseError, KeyError,
+                    ValueError) as error:
+                raise CommandError(
+                    f'Ошибка после записи {done}: {error}. '
+                    f'Исправьте файл и запустите команду снова.')
+        self.reset_sequences()
+        if not options['no_rebuild']:
+            self.stdout.write('Пересчёт счётчиков, лент и индексов')
+            rebuild_derived()
+        checkpoint.clear()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {imported} за {elapsed:.1f} с '
+            f'({imported / max(elapsed, 1e-6):.0f} в секунду)'))
+
+    def save(self, batch):
+        with transaction.atomic(), explicit_dates(Post, Comment):
+            archive.save_batch(batch)
+
+    def report(self, imported, started):
+        if self.verbosity < 2:
+            return
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{imported} записей, {imported / max(elapsed, 1e-6):.0f} '
+            f'в секунду')
+
+    def reset_sequences(self):
+        # Записи с явным id не сдвигают последовательности PostgreSQL
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Group, Post, Comment])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
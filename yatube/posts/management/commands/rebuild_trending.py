@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг популярности всех постов'
+
+    def handle(self, *args, **options):
+        trending.rebuild()
+        self.stdout.write(self.style.SUCCESS('Рейтинг пересчитан'))
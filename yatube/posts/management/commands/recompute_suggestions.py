@@ -0,0 +1,51 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import suggestions
+
+CHUNK_SIZE = 500
+
+graph = None
+
+
+def _init(loaded_graph):
+    # Граф передаётся процессу один раз, а не с каждой порцией
+    global graph
+    graph = loaded_graph
+    connections.close_all()
+
+
+def _suggest(user_ids):
+    return [(user_id, graph.suggest(user_id)) for user_id in user_ids]
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов по всему графу подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Число процессов (по умолчанию - число ядер)')
+
+    def handle(self, *args, **options):
+        loaded = suggestions.FollowGraph.load()
+        readers = [loaded.ids[node] for node in loaded.following]
+        chunks = [
+            readers[start:start + CHUNK_SIZE]
+            for start in range(0, len(readers), CHUNK_SIZE)
+        ]
+        connections.close_all()
+        # Отписавшиеся от всех больше не получают рекомендаций
+        suggestions.remove_stale()
+        with ProcessPoolExecutor(
+                max_workers=options['processes'],
+                initializer=_init, initargs=(loaded,)) as executor:
+            # Порция пишется своей короткой транзакцией, пока процессы
+            # считают следующие: запись сайта не ждёт весь пересчёт
+            for results in executor.map(_suggest, chunks):
+                suggestions.store(results)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации посчитаны для {len(readers)} пользователей'))
@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+def _close_connections():
+    # Процессы наследуют соединение родителя, его нельзя делить
+    connections.close_all()
+
+
+def _warm(name):
+    try:
+        return name, generate(name), None
+    except Exception as error:
+        return name, 0, str(error)
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры всех картинок постов в нескольких процессах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count(),
+            help='Число процессов (по умолчанию - число ядер)')
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='').order_by()
+            .values_list('image', flat=True).distinct()
+        )
+        _close_connections()
+        built = failed = 0
+        with ProcessPoolExecutor(
+                max_workers=options['processes'],
+                initializer=_close_connections) as executor:
+            futures = [executor.submit(_warm, name) for name in names]
+            for future in as_completed(futures):
+                name, count, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                built += count
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюр построено: {built}, картинок с ошибками: {failed}'))
@@ -0,0 +1,67 @@
+import math
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Копия расчёта из posts.trending с настройками на момент миграции:
+# правки модуля и настроек не должны менять уже применённую миграцию.
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+DECAY_RATE = math.log(2) / timedelta(hours=12).total_seconds()
+POST_WEIGHT = 1.0
+FOLLOWER_WEIGHT = 0.5
+COMMENT_WEIGHT = 1.0
+
+
+def log_weight(weight, moment):
+    return math.log(weight) + DECAY_RATE * (moment - EPOCH).total_seconds()
+
+
+def logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def compute_scores(posts, comments):
+    created_by_post = {}
+    for post_id, created in comments.values_list(
+            'post_id', 'created').iterator():
+        created_by_post.setdefault(post_id, []).append(created)
+    rows = posts.values_list(
+        'pk', 'pub_date', 'author__counters__followers_count')
+    for pk, pub_date, followers in rows.iterator():
+        score = log_weight(
+            POST_WEIGHT + FOLLOWER_WEIGHT * math.log1p(followers or 0),
+            pub_date)
+        for created in created_by_post.get(pk, ()):
+            score = logaddexp(score, log_weight(COMMENT_WEIGHT, created))
+        yield pk, score
+
+
+def fill_scores(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    # Сначала всё посчитать: SQLite не изолирует чтение курсора от UPDATE
+    scores = list(compute_scores(Post.objects.all(), Comment.objects.all()))
+    for pk, score in scores:
+        Post.objects.filter(pk=pk).update(hot_score=score)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_score_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+# Копия правила из posts.excerpts на момент миграции
+def make_short_text(text):
+    index = text.find('.')
+    if index == -1:
+        return text[:100] + '...Продолжение следует'
+    return text[:index + 1].strip() + '  Продолжение следует...'
+
+
+def fill_short_text(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.only('pk', 'text').order_by('pk')
+    last = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            return
+        for post in batch:
+            post.short_text = make_short_text(post.text)
+        Post.objects.bulk_update(batch, ['short_text'])
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_imageblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='short_text',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+        migrations.RunPython(fill_short_text, migrations.RunPython.noop),
+    ]
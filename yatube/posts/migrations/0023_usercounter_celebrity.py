@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_celebrities(apps, schema_editor):
+    UserCounter = apps.get_model('posts', 'UserCounter')
+    UserCounter.objects.filter(
+        followers_count__gte=settings.FEED_FANOUT_LIMIT,
+    ).update(celebrity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_post_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounter',
+            name='celebrity',
+            field=models.BooleanField(default=False, verbose_name='Посты не раскладываются по лентам'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+    ]
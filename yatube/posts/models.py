@@ -1,7 +1,10 @@
 from core.models import CreatedModel
+from core.storage import ContentAddressedStorage
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .excerpts import make_short_text
+
 User = get_user_model()
 
 
@@ -28,6 +31,10 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         related_name="posts",
@@ -46,21 +53,59 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+    hot_score = models.FloatField(
+        'Рейтинг популярности',
+        default=0,
+        editable=False,
+    )
+    short_text = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+    )
 
-    def short_text(self):
-        index = self.text.find('.')
-        if index == -1:
-            # Точка не найдена, возвращаем первые 50 символов
-            return self.text[:100] + '...Продолжение следует'
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.short_text = make_short_text(self.text)
         else:
-            # Возвращаем текст до точки
-            return self.text[:index + 1].strip() + '  Продолжение следует...'
+            # По дате изменения устаревают закэшированные карточки поста
+            update_fields = {*update_fields, 'updated'}
+            if 'text' in update_fields:
+                self.short_text = make_short_text(self.text)
+                update_fields.add('short_text')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
 
     class Meta:
         ordering = ['-pub_date']
         default_related_name = 'posts'
+        indexes = [
+            models.Index(
+                fields=['pub_date', 'id'],
+                name='post_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-hot_score', '-id'],
+                name='post_hot_score_idx'
+            ),
+        ]
 
 
 class Comment(CreatedModel):
@@ -81,6 +126,14 @@ class Comment(CreatedModel):
         help_text='Введите комментария'
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.post
 
@@ -108,14 +161,119 @@ class Follow(models.Model):
                 name='check_not_self_follow'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return f'Подписка {self.user} на {self.author}'
 
 
+class UserCounter(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+    celebrity = models.BooleanField(
+        'Посты не раскладываются по лентам', default=False)
+
+    def __str__(self) -> str:
+        return f'Счётчики {self.user}'
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(
+        'Дата публикации',
+    )
+
+    class Meta:
+        ordering = ['-pub_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_post_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Лента {self.user}: пост {self.post_id}'
+
+
 class Contact(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
     subject = models.CharField(max_length=100)
     body = models.TextField()
     is_answered = models.BooleanField(default=False)
+
+
+class FollowSuggestion(models.Model):
+    """Заранее посчитанная рекомендация автора для подписки."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+        verbose_name='Рекомендованный автор'
+    )
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ['-score']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow_suggestion'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'],
+                name='suggestion_user_score_idx'
+            ),
+        ]
+
+
+class ImageBlob(models.Model):
+    """Файл картинки в хранилище по содержимому и число его постов."""
+    name = models.CharField('Имя файла', max_length=100, unique=True)
+    size = models.PositiveIntegerField('Размер, байт', default=0)
+    references = models.PositiveIntegerField('Число ссылок', default=0)
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,147 @@
+"""Полнотекстовый поиск постов.
+
+На SQLite посты индексируются виртуальной таблицей FTS5 ``posts_post_fts``
+(ключевое слово, текст и имя автора). В индекс и в запрос попадают
+основы слов после русского стеммера Портера, к каждому слову запроса
+добавляется ``*``, поэтому работает поиск по началу слова. Результаты
+ранжируются функцией bm25. На других СУБД остаётся поиск через icontains.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'posts_post_fts'
+# Веса столбцов для bm25: titul, text, username.
+RANK = f'bm25({FTS_TABLE}, 5.0, 1.0, 2.0)'
+WORD = re.compile(r'\w+')
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$')
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$')
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|'
+    r'ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$')
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$')
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_SUFFIX = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word):
+    """Основа слова по русскому стеммеру Портера (Snowball)."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if not match:
+        return word
+    start, rv = match.groups()
+    temp = PERFECTIVE_GERUND.sub('', rv, 1)
+    if temp == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        temp = ADJECTIVE.sub('', rv, 1)
+        if temp != rv:
+            rv = PARTICIPLE.sub('', temp, 1)
+        else:
+            temp = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if temp == rv else temp
+    else:
+        rv = temp
+    rv = re.sub(r'и$', '', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_SUFFIX.sub('', rv, 1)
+    temp = re.sub(r'ь$', '', rv, 1)
+    if temp == rv:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        rv = re.sub(r'нн$', 'н', rv, 1)
+    else:
+        rv = temp
+    return start + rv
+
+
+def stem_text(text):
+    return ' '.join(stem(word) for word in WORD.findall(text or ''))
+
+
+def build_match(query):
+    """Запрос FTS5: все основы слов запроса, каждая как префикс."""
+    return ' '.join(
+        '"{}"*'.format(stem(word)) for word in WORD.findall(query))
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def index_post(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {FTS_TABLE} '
+            '(rowid, titul, text, username) VALUES (%s, %s, %s, %s)',
+            [post.pk, stem_text(post.titul), stem_text(post.text),
+             post.author.username.lower()],
+        )
+
+
+def unindex_post(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+def reindex_author(user):
+    """Обновляет имя автора во всех его постах в индексе."""
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {FTS_TABLE} SET username = %s WHERE rowid IN '
+            '(SELECT id FROM posts_post WHERE author_id = %s)',
+            [user.username.lower(), user.pk],
+        )
+
+
+def rebuild():
+    """Заново строит индекс по всем постам."""
+    from .models import Post
+
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    for post in Post.objects.select_related('author').iterator():
+        index_post(post)
+
+
+def search_posts(queryset, query):
+    """Фильтрует queryset по запросу и упорядочивает по релевантности."""
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    if not is_available():
+        return queryset.filter(
+            Q(titul__icontains=query)
+            | Q(text__icontains=query)
+            | Q(author__username__icontains=query)
+        )
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = posts_post.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': RANK},
+        order_by=['search_rank'],
+    )
@@ -0,0 +1,210 @@
+from core.cache import bump_generation
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (counters, events, feed, images, loaders, search,
+               suggestions, thumbnails, trending)
+from .models import Comment, Follow, Group, Post, User, UserCounter
+
+
+@receiver(post_save, sender=User)
+def create_counters(sender, instance, created, **kwargs):
+    if created:
+        UserCounter.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def process_image(sender, instance, **kwargs):
+    # Миниатюры новой картинки строятся уже по очищенной копии
+    if not images.schedule_cleanup(instance):
+        thumbnails.schedule(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_author(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and 'username' not in update_fields):
+        return
+    search.reindex_author(instance)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+        feed.author_gained_follower(instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+    feed.author_lost_follower(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def clear_feed(sender, instance, **kwargs):
+    feed.remove(instance)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_post(instance.post_id, 1)
+
+
+@receiver(post_save, sender=Post)
+def score_post(sender, instance, created, **kwargs):
+    if created:
+        trending.score_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def announce_post(sender, instance, created, **kwargs):
+    if created:
+        events.announce(instance)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.record_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    counters.bump_post(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    instance._previous_group_id, instance._previous_image = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('group_id', 'image').first() or (None, None))
+
+
+@receiver(post_save, sender=Post)
+def reference_image(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_image', None) or ''
+    if instance.image.name == previous:
+        return
+    images.acquire(instance.image.name)
+    if not created:
+        images.release(previous)
+
+
+@receiver(post_delete, sender=Post)
+def unreference_image(sender, instance, **kwargs):
+    images.release(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def expire_post_pages(sender, instance, **kwargs):
+    group_ids = {
+        instance.group_id, getattr(instance, '_previous_group_id', None)}
+    slugs = Group.objects.filter(pk__in=group_ids - {None}).values_list(
+        'slug', flat=True)
+    bump_generation(
+        'posts',
+        'trending',
+        f'author:{instance.author.username}',
+        *(f'group:{slug}' for slug in slugs),
+    )
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def forget_suggestions(sender, instance, **kwargs):
+    suggestions.forget(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def expire_follow_pages(sender, instance, **kwargs):
+    # В профилях выводятся числа подписчиков и подписок
+    bump_generation(
+        f'author:{instance.author.username}',
+        f'author:{instance.user.username}',
+        f'follows:{instance.user_id}',
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def expire_comment_pages(sender, instance, **kwargs):
+    # comment_counts - списки API с числом комментариев постов
+    bump_generation(
+        f'comments:{instance.post_id}', 'trending', 'comment_counts')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def expire_group_pages(sender, instance, **kwargs):
+    bump_generation(f'group:{instance.slug}', 'meta')
+
+
+@receiver(post_save, sender=User)
+def expire_user_pages(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and 'last_login' in update_fields):
+        return
+    bump_generation('meta')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def forget_cached_post(sender, instance, **kwargs):
+    loaders.forget_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def forget_commented_post(sender, instance, **kwargs):
+    # В закэшированном посте хранится число комментариев
+    loaders.forget_post(instance.post_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_cached_group(sender, instance, **kwargs):
+    loaders.groups.forget(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def forget_cached_author(sender, instance, **kwargs):
+    loaders.authors.forget(instance.pk)
@@ -0,0 +1,138 @@
+"""Рекомендации «на кого подписаться» по графу подписок.
+
+Граф загружается один раз в списки смежности (``array`` с плотными
+номерами вместо id), после чего рекомендации каждого пользователя
+считаются без обращений к БД:
+
+* друзья друзей - авторы, на которых подписаны мои авторы;
+* совместные подписки - авторы, на которых подписаны читатели
+  моих авторов, с нормировкой на популярность (косинусная мера).
+
+Готовые списки хранятся в ``FollowSuggestion`` и кэшируются
+по пользователю; страницы только читают их.
+"""
+import math
+from array import array
+from collections import defaultdict
+
+from core.cache import bump_generation, get_or_compute
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow, FollowSuggestion
+
+CACHE_KEY = 'suggestions:{}'
+
+
+class FollowGraph:
+    """Граф подписок в виде списков смежности."""
+
+    def __init__(self, edges):
+        self.ids = []
+        index = {}
+        following = defaultdict(lambda: array('i'))
+        followers = defaultdict(lambda: array('i'))
+        for user_id, author_id in edges:
+            for pk in (user_id, author_id):
+                if pk not in index:
+                    index[pk] = len(self.ids)
+                    self.ids.append(pk)
+            following[index[user_id]].append(index[author_id])
+            followers[index[author_id]].append(index[user_id])
+        self.index = index
+        self.following = dict(following)
+        self.followers = dict(followers)
+
+    @classmethod
+    def load(cls):
+        return cls(Follow.objects.values_list('user_id', 'author_id')
+                   .order_by('author_id', '-id').iterator())
+
+    def suggest(self, user_id, limit=None, sample=None):
+        """Лучшие авторы для пользователя: пары ``(author_id, score)``."""
+        if limit is None:
+            limit = settings.SUGGESTIONS_LIMIT
+        if sample is None:
+            sample = settings.SUGGESTIONS_COFOLLOW_SAMPLE
+        node = self.index.get(user_id)
+        if node is None:
+            return []
+        mine = self.following.get(node, ())
+        known = set(mine)
+        known.add(node)
+        scores = defaultdict(float)
+        for author in mine:
+            for candidate in self.following.get(author, ()):
+                scores[candidate] += settings.SUGGESTIONS_FOF_WEIGHT
+            readers = self.followers.get(author, ())
+            # У популярных авторов берутся только последние читатели
+            for reader in readers[:sample]:
+                for candidate in self.following.get(reader, ()):
+                    scores[candidate] += (
+                        settings.SUGGESTIONS_COFOLLOW_WEIGHT / math.sqrt(
+                            len(readers)
+                            * len(self.followers[candidate])))
+        ranked = sorted(
+            (
+                (score, self.ids[candidate])
+                for candidate, score in scores.items()
+                if candidate not in known
+            ),
+            reverse=True,
+        )
+        return [(author_id, score) for score, author_id in ranked[:limit]]
+
+
+def store(results):
+    """Заменяет сохранённые рекомендации пар ``(user_id, рекомендации)``.
+
+    Одна короткая транзакция на вызов; кэш сбрасывается после её
+    фиксации, иначе параллельное чтение закэшировало бы старый список.
+    """
+    results = list(results)
+    user_ids = [user_id for user_id, _ in results]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create([
+            FollowSuggestion(
+                user_id=user_id, author_id=author_id, score=score)
+            for user_id, found in results
+            for author_id, score in found
+        ])
+        transaction.on_commit(lambda: forget_many(user_ids))
+
+
+def remove_stale():
+    """Удаляет рекомендации отписавшихся от всех пользователей."""
+    stale = FollowSuggestion.objects.exclude(
+        user_id__in=Follow.objects.values('user_id'))
+    with transaction.atomic():
+        user_ids = set(stale.values_list('user_id', flat=True))
+        stale.delete()
+        transaction.on_commit(lambda: forget_many(user_ids))
+
+
+def for_user(user):
+    """Рекомендованные авторы из кэша или сохранённого списка."""
+    def load():
+        suggestions = (
+            FollowSuggestion.objects.filter(user=user)
+            .exclude(author_id__in=user.follower.values('author_id'))
+            .select_related('author')[:settings.SUGGESTIONS_LIMIT]
+        )
+        return [suggestion.author for suggestion in suggestions]
+
+    return get_or_compute(
+        CACHE_KEY.format(user.pk), load, settings.SUGGESTIONS_CACHE_TIMEOUT)
+
+
+def forget(user_id):
+    cache.delete(CACHE_KEY.format(user_id))
+    # Рекомендации выводятся в профилях, которые смотрит пользователь
+    bump_generation(f'suggestions:{user_id}')
+
+
+def forget_many(user_ids):
+    for user_id in user_ids:
+        forget(user_id)
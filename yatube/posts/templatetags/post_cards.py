@@ -0,0 +1,48 @@
+"""Карточки постов из кэша фрагментов.
+
+``{% post_cards page_obj as cards %}`` возвращает пары (пост, разметка
+карточки). Карточки всей страницы читаются из кэша одним ``get_many``,
+отрисовываются только недостающие и сохраняются одним ``set_many``.
+
+Ключ карточки - шаблон с параметрами, id и дата изменения поста,
+число комментариев и поколение ``meta``: оно растёт при изменении
+пользователей и групп, чьи имена выводятся в карточке.
+"""
+from core.cache import get_generations
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+CARD_KEY = 'post_card:{}:{}:{}:{}:{}:{}'
+
+
+def card_key(post, template_name, options, meta):
+    variant = ','.join(f'{name}={value}' for name, value in options)
+    return CARD_KEY.format(
+        template_name, variant, post.pk, post.updated.timestamp(),
+        post.comments_count, meta)
+
+
+@register.simple_tag
+def post_cards(posts, template_name=CARD_TEMPLATE, **options):
+    posts = list(posts)
+    options = sorted(options.items())
+    meta, = get_generations(['meta'])
+    keys = [card_key(post, template_name, options, meta) for post in posts]
+    found = cache.get_many(keys)
+    rendered = {}
+    cards = []
+    for post, key in zip(posts, keys):
+        html = found.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                template_name, {'post': post, **dict(options)})
+        cards.append((post, mark_safe(html)))
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_TIMEOUT)
+    return cards
@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..archive import Checkpoint
+from ..models import Comment, Group, Post, UserCounter
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def call(self, *args, **options):
+        call_command(*args, stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_export_import_round_trip(self):
+        """Выгрузка загружается обратно со ссылками и датами."""
+        post = Post.objects.create(
+            author=self.author, group=self.group, titul='Заголовок',
+            text='Текст')
+        Comment.objects.create(post=post, author=self.author, text='Ответ')
+        output = self.path('archive.ndjson')
+        self.call('export_posts', output=output, chunk_size=1)
+        self.assertFalse(os.path.exists(f'{output}.checkpoint'))
+        Post.objects.all().delete()
+        Group.objects.all().delete()
+
+        self.call('import_posts', output, batch_size=2)
+        imported = Post.objects.get(pk=post.pk)
+        self.assertEqual(imported.pub_date, post.pub_date)
+        self.assertEqual(imported.group.slug, 'group')
+        self.assertEqual(imported.comments.get().text, 'Ответ')
+        self.assertEqual(imported.comments_count, 1)
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).posts_count, 1)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Загрузка продолжается с записи после чекпоинта."""
+        source = self.path('posts.ndjson')
+        with open(source, 'w') as file:
+            for number in range(3):
+                file.write(json.dumps({
+                    'model': 'post', 'author': 'blogger',
+                    'text': f'Пост {number}'}) + '\n')
+        Checkpoint(f'{source}.checkpoint').save({'records': 1})
+        self.call('import_posts', source)
+        self.assertEqual(
+            list(Post.objects.order_by('pk').values_list('text', flat=True)),
+            ['Пост 1', 'Пост 2'])
+        self.assertTrue(User.objects.filter(username='blogger').exists())
+
+    def test_failed_batch_keeps_checkpoint(self):
+        """Ошибка откатывает порцию, чекпоинт указывает на последнюю целую."""
+        source = self.path('posts.csv')
+        with open(source, 'w') as file:
+            file.write('author,text,pub_date\n')
+            file.write('blogger,Первый,2023-01-01T10:00:00\n')
+            file.write('blogger,Второй,не дата\n')
+        with self.assertRaises(CommandError):
+            self.call('import_posts', source, model='post', batch_size=1)
+        self.assertEqual(Post.objects.get().text, 'Первый')
+        self.assertEqual(
+            Checkpoint(f'{source}.checkpoint').load(), {'records': 1})
+
+    def test_export_resume_drops_unconfirmed_tail(self):
+        """Продолжение выгрузки не повторяет записи после чекпоинта."""
+        for number in range(3):
+            Post.objects.create(author=self.author, text=f'Пост {number}')
+        output = self.path('posts.csv')
+        self.call('export_posts', output=output, model=['post'])
+        with open(output, 'rb') as file:
+            complete = file.read()
+        # Будто выгрузка упала после первой записи и начала писать вторую
+        first_line_end = complete.index(b'\n', complete.index(b'\n') + 1) + 1
+        with open(output, 'wb') as file:
+            file.write(complete[:first_line_end] + 'обрывок'.encode())
+        last = Post.objects.order_by('pk').first().pk
+        Checkpoint(f'{output}.checkpoint').save({
+            'last': {'post': last}, 'offset': first_line_end})
+        self.call('export_posts', output=output, model=['post'])
+        with open(output, 'rb') as file:
+            self.assertEqual(file.read(), complete)
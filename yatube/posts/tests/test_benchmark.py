@@ -0,0 +1,49 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, FeedEntry, Follow, Post, UserCounter
+from ..urls import urlpatterns
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'generate_dataset', users=30, groups=3, posts=200,
+            comments=300, follows=5, seed=1, stdout=StringIO())
+
+    def test_dataset_is_complete(self):
+        """Набор данных создан, производные данные пересчитаны."""
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedEntry.objects.exists())
+        self.assertEqual(UserCounter.objects.count(), 30)
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count(), 200)
+
+    def test_benchmark_writes_every_view(self):
+        """Результат содержит замеры всех адресов posts.urls."""
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'result.json')
+            call_command(
+                'benchmark_views', iterations=3, warmup=1,
+                output=output, stdout=StringIO())
+            call_command(
+                'benchmark_views', iterations=3, warmup=1,
+                output=os.path.join(directory, 'again.json'),
+                compare=output, threshold=100, stdout=StringIO())
+            with open(output) as file:
+                result = json.load(file)
+        self.assertEqual(
+            set(result['views']),
+            {pattern.name for pattern in urlpatterns})
+        for view in result['views'].values():
+            self.assertLessEqual(view['p50'], view['p99'])
+            self.assertIn(view['status'], (200, 302))
@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+DETAIL = 'posts:post_detail'
+COMMENT_LIST = 'posts:comment_list'
+COMMENTS_PER_PAGE = 3
+
+
+@override_settings(NUMBER_COMMENTS_FOR_PAGE=COMMENTS_PER_PAGE)
+class PostCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.other_post = Post.objects.create(author=cls.user, text='Другой')
+        Comment.objects.create(
+            post=cls.other_post, author=cls.user, text='Чужой')
+        cls.comments = [
+            Comment.objects.create(post=cls.post, author=cls.user, text=f'{i}')
+            for i in range(COMMENTS_PER_PAGE + 2)
+        ]
+
+    def test_detail_shows_only_first_chunk_of_own_comments(self):
+        """На странице поста первая порция его комментариев."""
+        response = self.client.get(
+            reverse(DETAIL, kwargs={'post_id': self.post.pk}))
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.pk for comment in comments],
+            [comment.pk for comment in self.comments[::-1][:3]])
+        self.assertTrue(comments.has_next())
+
+    def test_comment_list_loads_next_chunk(self):
+        """JSON-ручка отдаёт остальные комментарии по курсору."""
+        url = reverse(COMMENT_LIST, kwargs={'post_id': self.post.pk})
+        first = self.client.get(url).json()
+        second = self.client.get(url, {'cursor': first['next_cursor']}).json()
+        self.assertEqual(
+            [comment['id'] for comment in second['comments']],
+            [comment.pk for comment in self.comments[1::-1]])
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(second['comments'][0]['author'], 'user')
+
+    def test_comments_load_without_n_plus_one(self):
+        """Авторы комментариев загружаются одним запросом."""
+        url = reverse(COMMENT_LIST, kwargs={'post_id': self.post.pk})
+        with self.assertNumQueries(2):
+            self.client.get(url)
@@ -0,0 +1,102 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache import LOCK_KEY, PAGE_KEY
+
+from .. import suggestions
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def revalidate(self, client, url):
+        """ETag ответа и ответ на повторный условный запрос."""
+        # Первый ответ ставит CSRF-cookie, от которой зависит ETag
+        client.get(url)
+        etag = client.get(url)['ETag']
+        return etag, client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_not_modified(self):
+        """Неизменившиеся страницы отдают 304 без запросов к БД."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:trending'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_changes_expire_etag(self):
+        """Изменение данных страницы даёт новый ETag и полный ответ."""
+        detail = reverse('posts:post_detail', args=(self.post.pk,))
+        profile = reverse('posts:profile', args=(self.author.username,))
+        cases = (
+            (reverse('posts:index'), lambda: Post.objects.create(
+                author=self.author, text='Новый')),
+            (detail, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий')),
+            (profile, lambda: Follow.objects.create(
+                user=self.reader, author=self.author)),
+            (profile, lambda: suggestions.forget(self.reader.pk)),
+            (reverse('posts:follow_index'), lambda: Follow.objects.filter(
+                user=self.reader).delete()),
+        )
+        for url, change in cases:
+            with self.subTest(url=url):
+                etag, response = self.revalidate(self.reader_client, url)
+                self.assertEqual(response.status_code, 304)
+                change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CACHE_LOCK_WAIT=0)
+    def test_bump_during_recompute_not_pinned(self):
+        """Сброс во время чужого пересчёта не закрепляет старую страницу."""
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(author=self.author, text='Новый пост')
+        path = hashlib.md5(url.encode()).hexdigest()
+        cache.add(LOCK_KEY.format(PAGE_KEY.format(path)), 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        """Страница одного пользователя не подходит другому."""
+        url = reverse('posts:index')
+        etag = self.reader_client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+
+from .. import events
+from ..events import resolve_channels
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class PostEventsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='cats', description='Описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def scope(self, query, cookie=''):
+        return {
+            'query_string': query.encode(),
+            'headers': [(b'cookie', cookie.encode())],
+        }
+
+    def test_scopes(self):
+        """Канал выбирается по параметру scope."""
+        self.assertEqual(resolve_channels(self.scope('')), ['posts'])
+        self.assertEqual(
+            resolve_channels(self.scope('scope=group&slug=cats')),
+            ['group:cats'])
+        self.assertIsNone(
+            resolve_channels(self.scope('scope=group&slug=dogs')))
+
+    def test_follow_scope_needs_session(self):
+        """Лента подписок - каналы авторов вошедшего пользователя."""
+        self.assertIsNone(resolve_channels(self.scope('scope=follow')))
+        client = Client()
+        client.force_login(self.reader)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'
+        self.assertEqual(
+            resolve_channels(self.scope('scope=follow', cookie)),
+            [f'author:{self.author.pk}'])
+
+    def test_new_post_is_published_after_commit(self):
+        """Новый пост публикуется в каналы ленты, группы и автора."""
+        with mock.patch.object(events.transaction, 'on_commit') as hook, \
+                mock.patch.object(events.hub, 'publish') as publish:
+            post = Post.objects.create(
+                author=self.author, group=self.group, text='Пост')
+            publish.assert_not_called()
+            callback, = hook.call_args[0]
+            callback()
+        channels, event = publish.call_args[0]
+        self.assertEqual(
+            channels, ['posts', f'author:{self.author.pk}', 'group:cats'])
+        self.assertEqual(event['data']['id'], post.pk)
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..excerpts import make_short_text
+from ..models import Post
+
+User = get_user_model()
+
+
+class ShortTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+
+    def test_excerpt(self):
+        self.assertEqual(
+            make_short_text('Первое. Второе.'),
+            'Первое.  Продолжение следует...')
+        self.assertEqual(
+            make_short_text('а' * 150), 'а' * 100 + '...Продолжение следует')
+
+    def test_computed_on_save(self):
+        """Анонс считается при сохранении и при изменении текста."""
+        post = Post.objects.create(author=self.user, text='Начало. Конец.')
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).short_text,
+            'Начало.  Продолжение следует...')
+        post.text = 'Другое начало. Конец.'
+        post.save(update_fields=['text'])
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).short_text,
+            'Другое начало.  Продолжение следует...')
+
+    def test_backfill_command(self):
+        """Команда заполняет анонсы постов, загруженных bulk_create."""
+        Post.objects.bulk_create(
+            [Post(author=self.user, text=f'Пост {number}. Ещё.')
+             for number in range(3)])
+        call_command('backfill_short_text', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            sorted(Post.objects.values_list('short_text', flat=True)),
+            [f'Пост {number}.  Продолжение следует...'
+             for number in range(3)])
+
+    def test_index_skips_full_text(self):
+        """Главная выводит анонсы и не выбирает полный текст."""
+        Post.objects.create(author=self.user, text='Анонс. ' + 'х' * 1000)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Анонс.  Продолжение следует...')
+        self.assertNotContains(response, 'х' * 1000)
+        self.assertFalse(any(
+            '"posts_post"."text"' in query['sql']
+            for query in queries.captured_queries))
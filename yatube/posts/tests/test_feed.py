@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feed
+from ..models import FeedEntry, Follow, Post
+
+User = get_user_model()
+FOLLOW_INDEX = 'posts:follow_index'
+
+
+def run_on_commit(function):
+    function()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def feed_ids(self):
+        response = self.authorized_client.get(reverse(FOLLOW_INDEX))
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.other, text='Чужой пост')
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.pk])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка заполняет ленту, отписка очищает."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed_ids(), [post.pk])
+        follow.delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_celebrity_posts_are_read_on_demand(self):
+        """Посты популярных авторов не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [post.pk])
+
+    @override_settings(FEED_FANOUT_LIMIT=3, FEED_FANOUT_RESUME_LIMIT=2)
+    def test_fan_out_resumes_below_lower_limit(self):
+        """Раскладка возвращается только ниже нижнего порога и в фоне."""
+        third = User.objects.create(username='third')
+        for user in (self.reader, self.other, third):
+            Follow.objects.create(user=user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(FeedEntry.objects.exists())
+        with mock.patch.object(feed, '_get_executor') as executor, \
+                mock.patch.object(feed.transaction, 'on_commit',
+                                  run_on_commit):
+            Follow.objects.filter(user=third).delete()
+            self.assertEqual(self.feed_ids(), [post.pk])
+            Follow.objects.filter(user=self.other).delete()
+            Follow.objects.create(user=self.other, author=self.author)
+            Follow.objects.filter(user=self.other).delete()
+        executor.return_value.submit.assert_called_once_with(
+            feed._backfill_in_background, self.author.pk)
+        self.assertFalse(feed.is_celebrity(self.author.pk))
+        feed.backfill_recent(self.author.pk)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.pk])
+
+    @override_settings(FEED_BACKFILL_POSTS=1)
+    def test_backfill_recent_adds_latest_posts(self):
+        """Фоновая раскладка добавляет только последние посты автора."""
+        Post.objects.create(author=self.author, text='Старый пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedEntry.objects.all().delete()
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        FeedEntry.objects.all().delete()
+        feed.backfill_recent(self.author.pk)
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('post_id', flat=True)),
+            [post.pk])
@@ -1,3 +1,4 @@
+import hashlib
 import shutil
 import tempfile
 from http import HTTPStatus
@@ -27,7 +28,9 @@ SMAIL_GIF = (
     b'\x00\x00\x01\x00\x01\x00\x00\x02'
     b'\x02\x4c\x01\x00\x3b'
 )
-IMAGE = 'posts/small.gif'
+DIGEST = hashlib.sha256(SMAIL_GIF).hexdigest()
+# Картинки хранятся под digest содержимого
+IMAGE = f'posts/{DIGEST[:2]}/{DIGEST}.gif'
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
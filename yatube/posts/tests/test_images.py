@@ -0,0 +1,189 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future
+from io import BytesIO, StringIO
+from unittest import mock
+
+from core.storage import is_addressed
+from core.uploads import DigestMemoryFileUploadHandler
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import images
+from ..models import ImageBlob, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_bytes(color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', (40, 20), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def upload(name='meme.png', color='red'):
+    return SimpleUploadedFile(name, image_bytes(color), 'image/png')
+
+
+def run_on_commit(function):
+    function()
+
+
+def run_inline(function, *args):
+    future = Future()
+    future.set_result(function(*args))
+    return future
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_PREGENERATE=False,
+                   IMAGE_CLEANUP=False)
+class ContentAddressedImagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def post(self, name='meme.png', color='red', image=None):
+        return Post.objects.create(
+            author=self.user, text='Пост',
+            image=image or upload(name, color))
+
+    def test_duplicates_share_one_file(self):
+        """Одинаковые картинки хранятся одним файлом под digest."""
+        first = self.post('one.png')
+        second = self.post('two.PNG')
+        digest = hashlib.sha256(image_bytes()).hexdigest()
+        self.assertEqual(
+            first.image.name, f'posts/{digest[:2]}/{digest}.png')
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertEqual(
+            ImageBlob.objects.get(name=first.image.name).references, 2)
+        self.assertNotEqual(self.post(color='blue').image.name,
+                            first.image.name)
+
+    @mock.patch.object(images.transaction, 'on_commit', run_on_commit)
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется вместе с последним ссылающимся постом."""
+        first, second = self.post(), self.post()
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    @mock.patch.object(images.transaction, 'on_commit', run_on_commit)
+    def test_replaced_image_released(self):
+        """Замена картинки снимает ссылку на прежний файл."""
+        post = self.post()
+        old = post.image.name
+        post.image = upload(color='green')
+        post.save()
+        self.assertFalse(ImageBlob.objects.filter(name=old).exists())
+        self.assertEqual(
+            ImageBlob.objects.get(name=post.image.name).references, 1)
+
+    def test_rebuild_restores_references(self):
+        """Пересчёт находит ссылки постов, созданных в обход сигналов."""
+        name = self.post().image.name
+        Post.objects.bulk_create(
+            [Post(author=self.user, text='Копия', image=name)] * 2)
+        ImageBlob.objects.all().delete()
+        images.rebuild()
+        self.assertEqual(ImageBlob.objects.get(name=name).references, 3)
+
+    def test_dedupe_moves_legacy_files(self):
+        """Команда переносит старые файлы под digest и объединяет копии."""
+        legacy = []
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for number in range(2):
+            name = f'posts/legacy{number}.png'
+            with open(os.path.join(TEMP_MEDIA_ROOT, name), 'wb') as file:
+                file.write(image_bytes('yellow'))
+            legacy.append(Post.objects.create(
+                author=self.user, text='Старый', image=name))
+        call_command('dedupe_images', stdout=StringIO())
+        names = {post.image.name
+                 for post in Post.objects.filter(text='Старый')}
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(is_addressed(name))
+        self.assertEqual(ImageBlob.objects.get(name=name).references, 2)
+        self.assertFalse(os.path.exists(legacy[0].image.path))
+
+    @mock.patch.object(images.transaction, 'on_commit', run_on_commit)
+    def test_clean_replaces_image(self):
+        """Пост переключается на копию без EXIF, исходник удаляется."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Камера'
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20), 'red').save(
+            buffer, 'JPEG', exif=exif.tobytes())
+        post = self.post(image=SimpleUploadedFile(
+            'photo.jpg', buffer.getvalue(), 'image/jpeg'))
+        original = post.image.path
+        cleaned = images.clean(post.pk, post.image.name, run_inline)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, cleaned)
+        with open(post.image.path, 'rb') as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        self.assertEqual(cleaned, f'posts/{digest[:2]}/{digest}.jpg')
+        with Image.open(post.image.path) as image:
+            self.assertNotIn('exif', image.info)
+        self.assertFalse(os.path.exists(original))
+        self.assertEqual(
+            list(ImageBlob.objects.values_list('name', flat=True)),
+            [cleaned])
+
+    def test_unchanged_clean_keeps_image(self):
+        """Копия с теми же байтами - тот же файл, пост не меняется."""
+        post = self.post()
+        name = post.image.name
+        with open(post.image.path, 'rb') as file:
+            data = file.read()
+        self.assertEqual(images.clean(
+            post.pk, name, lambda *args: run_inline(lambda: data)), name)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        self.assertEqual(
+            ImageBlob.objects.get(name=name).references, 1)
+
+    def test_cleanup_scheduled_for_new_images(self):
+        """Очистка ставится в очередь только для новой картинки."""
+        post = self.post()
+        with self.settings(IMAGE_CLEANUP=True), mock.patch.object(
+                images.transaction, 'on_commit') as hook:
+            post._previous_image = ''
+            self.assertTrue(images.schedule_cleanup(post))
+            post._previous_image = post.image.name
+            self.assertFalse(images.schedule_cleanup(post))
+        hook.assert_called_once()
+
+
+class DigestUploadHandlerTests(TestCase):
+    def test_digest_computed_while_receiving(self):
+        """Обработчик загрузки считает SHA-256 по принятым кускам."""
+        data = image_bytes()
+        handler = DigestMemoryFileUploadHandler()
+        handler.handle_raw_input(None, {}, len(data), 'boundary')
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('image', 'meme.png', 'image/png', len(data))
+        for start in range(0, len(data), 16):
+            self.assertIsNone(
+                handler.receive_data_chunk(data[start:start + 16], start))
+        file = handler.file_complete(len(data))
+        self.assertEqual(
+            file.content_digest, hashlib.sha256(data).hexdigest())
@@ -0,0 +1,80 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+POSTS_COUNT = 15
+FULL_SCAN = re.compile(r'^SCAN \S+$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class ListingIndexesTests(TestCase):
+    """Запросы списков идут по индексам, без полного скана с сортировкой."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(POSTS_COUNT):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'{i}')
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'{i}')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def plans(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url, params)
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                yield query['sql'], [row[-1] for row in cursor.fetchall()]
+
+    def assert_indexed(self, url, params=None):
+        for sql, plan in self.plans(url, params):
+            full_scan = any(FULL_SCAN.match(step) for step in plan)
+            with self.subTest(url=url, sql=sql):
+                self.assertFalse(
+                    full_scan and TEMP_SORT in plan,
+                    f'Полный скан с сортировкой: {plan}')
+
+    def next_cursor(self, url):
+        response = self.authorized_client.get(url)
+        return response.context['page_obj'].next_cursor
+
+    def test_listings_use_indexes(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:trending'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            self.assert_indexed(url)
+
+    def test_cursor_pages_use_indexes(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            self.assert_indexed(url, {'cursor': self.next_cursor(url)})
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import loaders
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ListingLoaderTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст поста')
+
+    def setUp(self):
+        cache.clear()
+
+    def load(self):
+        page_obj = Paginator(Post.objects.only('pk'), 10).page(1)
+        post, = loaders.load_page(page_obj).object_list
+        return post
+
+    def test_warm_page_needs_only_keys(self):
+        """Со страницы в кэше из БД читаются только ключи постов."""
+        self.load()
+        with self.assertNumQueries(2):
+            post = self.load()
+            self.assertEqual(post.text, 'Текст поста')
+            self.assertEqual(post.author.username, 'author')
+            self.assertEqual(post.group.title, 'Группа')
+
+    def test_saves_expire_cached_objects(self):
+        """Сохранение поста, группы, автора и комментария сбрасывает кэш."""
+        changes = (
+            (Post, self.post.pk, 'text', lambda post: post.text),
+            (Group, self.group.pk, 'title', lambda post: post.group.title),
+            (User, self.author.pk, 'first_name',
+             lambda post: post.author.first_name),
+        )
+        for model, pk, field, value in changes:
+            with self.subTest(model=model.__name__):
+                self.load()
+                obj = model.objects.get(pk=pk)
+                setattr(obj, field, 'Новое значение')
+                obj.save()
+                self.assertEqual(value(self.load()), 'Новое значение')
+        self.load()
+        Comment.objects.create(post=self.post, author=self.author, text='К')
+        self.assertNotIn(
+            loaders.posts.key(self.post.pk),
+            cache.get_many([loaders.posts.key(self.post.pk)]))
+
+    def test_deleted_post_dropped_from_page(self):
+        page_obj = Paginator(Post.objects.only('pk'), 10).page(1)
+        list(page_obj.object_list)
+        Post.objects.filter(pk=self.post.pk).delete()
+        self.assertEqual(loaders.load_page(page_obj).object_list, [])
+
+    def test_listing_renders_from_loader(self):
+        self.client.get(reverse('posts:index'))
+        self.assertIn(
+            loaders.post_summaries.key(self.post.pk),
+            cache.get_many([loaders.post_summaries.key(self.post.pk)]))
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Comment, Group, Post
+from ..templatetags import post_cards
+
+User = get_user_model()
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание')
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(3))
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self, **options):
+        posts = Post.objects.select_related('author', 'group')
+        return [str(card) for _, card in post_cards.post_cards(
+            posts, author_link=True, **options)]
+
+    def test_cached_cards_fetched_in_one_batch(self):
+        """Повторная отрисовка - без шаблонов и поштучных чтений кэша."""
+        first = self.render()
+        with mock.patch.object(
+                post_cards, 'render_to_string') as render, \
+                mock.patch.object(
+                    post_cards.cache, 'get_many',
+                    wraps=post_cards.cache.get_many) as get_many:
+            self.assertEqual(self.render(), first)
+        render.assert_not_called()
+        # Поколение meta и все карточки страницы
+        self.assertEqual(get_many.call_count, 2)
+        self.assertEqual(len(get_many.call_args[0][0]), 3)
+
+    def test_options_are_part_of_key(self):
+        self.assertNotEqual(self.render(), self.render(comments=True))
+
+    def test_changes_expire_card(self):
+        """Правка поста, комментарий и новое имя автора меняют карточку."""
+        post = Post.objects.first()
+        changes = (
+            lambda: Post.objects.get(pk=post.pk).save(),
+            lambda: Comment.objects.create(
+                post=post, author=self.author, text='Комментарий'),
+            lambda: User.objects.filter(pk=self.author.pk).first().save(),
+        )
+        for change in changes:
+            with self.subTest(change=change):
+                self.render(comments=True)
+                change()
+                with mock.patch.object(
+                        post_cards, 'render_to_string',
+                        wraps=post_cards.render_to_string) as render:
+                    self.render(comments=True)
+                render.assert_called()
+
+    def test_updated_saved_with_update_fields(self):
+        """Сохранение части полей тоже сдвигает дату изменения."""
+        post = Post.objects.first()
+        updated = post.updated
+        post.titul = 'Новое'
+        post.save(update_fields=['titul'])
+        self.assertGreater(Post.objects.get(pk=post.pk).updated, updated)
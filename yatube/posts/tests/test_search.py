@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..search import stem
+
+User = get_user_model()
+INDEX = 'posts:index'
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='writer')
+        cls.blogger = User.objects.create(username='blogger')
+        cls.in_text = Post.objects.create(
+            author=cls.user, titul='Заметки', text='Пишу программы на Python')
+        cls.in_titul = Post.objects.create(
+            author=cls.user, titul='Программа', text='Без подробностей')
+        cls.other = Post.objects.create(
+            author=cls.blogger, titul='Кино', text='Смотрели фильм')
+
+    def found(self, query):
+        response = self.client.get(reverse(INDEX), {'q': query})
+        return [post.pk for post in response.context['page_obj']]
+
+    def test_stemmer(self):
+        """Разные формы слова сводятся к одной основе."""
+        self.assertEqual(stem('программы'), stem('программа'))
+        self.assertEqual(stem('Ёлки'), stem('елкой'))
+
+    def test_search_by_word_form_ranks_titul_first(self):
+        """Поиск находит другие формы слова, совпадение в заголовке выше."""
+        self.assertEqual(
+            self.found('программами'), [self.in_titul.pk, self.in_text.pk])
+
+    def test_prefix_and_author_search(self):
+        """Работает поиск по началу слова и по имени автора."""
+        self.assertEqual(self.found('фил'), [self.other.pk])
+        self.assertEqual(self.found('blogg'), [self.other.pk])
+
+    def test_index_follows_edit_and_delete(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = 'Читали книгу'
+        post.save()
+        self.assertEqual(self.found('фильм'), [])
+        self.assertEqual(self.found('книги'), [post.pk])
+        post.delete()
+        self.assertEqual(self.found('книги'), [])
+
+    def test_author_rename_is_indexed(self):
+        """После смены имени автора посты ищутся по новому имени."""
+        self.blogger.username = 'critic'
+        self.blogger.save()
+        self.assertEqual(self.found('critic'), [self.other.pk])
@@ -0,0 +1,81 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+from .. import suggestions
+from ..suggestions import FollowGraph
+
+User = get_user_model()
+PROFILE = 'posts:profile'
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.friend, cls.other, cls.star, cls.niche = [
+            User.objects.create(username=name)
+            for name in ('reader', 'friend', 'other', 'star', 'niche')
+        ]
+        # reader -> friend -> star; other читает friend, star и niche
+        for user, author in (
+            (cls.reader, cls.friend),
+            (cls.friend, cls.star),
+            (cls.other, cls.friend),
+            (cls.other, cls.star),
+            (cls.other, cls.niche),
+        ):
+            Follow.objects.create(user=user, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_friends_of_friends_rank_first(self):
+        """Автор друга и соавторы по подпискам попадают в рекомендации."""
+        graph = FollowGraph.load()
+        suggested = [
+            author_id for author_id, _ in graph.suggest(self.reader.pk)]
+        self.assertEqual(suggested, [self.star.pk, self.niche.pk])
+
+    def test_followed_and_self_are_not_suggested(self):
+        """Свои подписки и сам пользователь не рекомендуются."""
+        graph = FollowGraph.load()
+        suggested = {
+            author_id for author_id, _ in graph.suggest(self.other.pk)}
+        self.assertFalse(
+            suggested & {self.other.pk, self.friend.pk, self.star.pk})
+
+    def test_profile_sidebar_reads_precomputed_list(self):
+        """Сайдбар профиля читает посчитанный командой список."""
+        call_command('recompute_suggestions', processes=1, stdout=StringIO())
+        self.assertTrue(
+            FollowSuggestion.objects.filter(
+                user=self.reader, author=self.star).exists())
+        self.client.force_login(self.reader)
+        url = reverse(PROFILE, kwargs={'username': 'friend'})
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context['suggestions'], [self.star, self.niche])
+
+        Follow.objects.create(user=self.reader, author=self.star)
+        response = self.client.get(url)
+        self.assertEqual(response.context['suggestions'], [self.niche])
+
+    def test_cache_dropped_after_commit(self):
+        """Кэш сбрасывается после фиксации записи, а не до неё."""
+        self.client.force_login(self.reader)
+        url = reverse(PROFILE, kwargs={'username': 'friend'})
+        self.assertEqual(self.client.get(url).context['suggestions'], [])
+        with mock.patch.object(
+                suggestions.transaction, 'on_commit') as on_commit:
+            suggestions.store([(self.reader.pk, [(self.star.pk, 1.0)])])
+        self.assertEqual(self.client.get(url).context['suggestions'], [])
+        on_commit.call_args[0][0]()
+        self.assertEqual(
+            self.client.get(url).context['suggestions'], [self.star])
@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image():
+    buffer = BytesIO()
+    Image.new('RGB', (40, 20), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile('red.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generate_builds_every_preset(self):
+        """Миниатюры всех размеров попадают в хранилище sorl."""
+        post = Post.objects.create(
+            author=self.user, text='С картинкой', image=make_image())
+        self.assertEqual(
+            thumbnails.generate(post.image.name),
+            len(settings.THUMBNAIL_PRESETS))
+        built = [
+            name for _, _, names in os.walk(
+                os.path.join(TEMP_MEDIA_ROOT, 'cache'))
+            for name in names
+        ]
+        self.assertEqual(len(built), len(settings.THUMBNAIL_PRESETS))
+
+    def test_missing_file_is_skipped(self):
+        """Для отсутствующего файла ничего не строится."""
+        self.assertEqual(thumbnails.generate('posts/missing.png'), 0)
+
+    @override_settings(THUMBNAIL_PREGENERATE=True)
+    def test_schedule_runs_after_commit(self):
+        """Нарезка ставится в очередь только для постов с картинкой."""
+        post = Post.objects.create(author=self.user, text='Без картинки')
+        with mock.patch.object(thumbnails.transaction, 'on_commit') as hook:
+            thumbnails.schedule(post)
+            post.image = make_image()
+            thumbnails.schedule(post)
+        self.assertEqual(hook.call_count, 1)
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import trending
+from ..models import Comment, Follow, Post
+
+User = get_user_model()
+TRENDING = 'posts:trending'
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def comment(self, post, count):
+        for _ in range(count):
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий')
+
+    def test_comments_raise_post(self):
+        """Обсуждаемый пост поднимается выше более свежего."""
+        discussed = Post.objects.create(author=self.author, text='Старый')
+        fresh = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(list(trending.top()), [fresh, discussed])
+        self.comment(discussed, 2)
+        self.assertEqual(list(trending.top()), [discussed, fresh])
+
+    def test_old_activity_decays(self):
+        """Вклад события вдвое меньше через период полураспада."""
+        now = timezone.now()
+        half_life = timedelta(hours=12)
+        with self.settings(TRENDING_HALF_LIFE=half_life):
+            old = trending.log_weight(2, now - half_life)
+            self.assertAlmostEqual(old, trending.log_weight(1, now))
+
+    def test_followers_raise_start(self):
+        """Пост автора с подписчиками стартует выше."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        popular = Post.objects.create(author=self.author, text='Пост')
+        unknown = Post.objects.create(author=self.reader, text='Пост')
+        self.assertGreater(popular.hot_score, unknown.hot_score)
+
+    def test_rebuild_matches_incremental_scores(self):
+        """Пересчёт с нуля даёт те же значения, что и сигналы."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.comment(post, 3)
+        post.refresh_from_db()
+        trending.rebuild()
+        self.assertAlmostEqual(
+            Post.objects.get(pk=post.pk).hot_score, post.hot_score)
+
+    def test_trending_page(self):
+        """Страница популярного выводит посты по рейтингу."""
+        quiet = Post.objects.create(author=self.author, text='Тихий')
+        loud = Post.objects.create(author=self.author, text='Громкий')
+        self.comment(quiet, 3)
+        response = self.client.get(reverse(TRENDING))
+        self.assertEqual(list(response.context['page_obj']), [quiet, loud])
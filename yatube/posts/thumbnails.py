@@ -0,0 +1,63 @@
+"""Заблаговременная нарезка миниатюр картинок постов.
+
+После сохранения поста миниатюры всех размеров из
+``settings.THUMBNAIL_PRESETS`` строятся в фоновом пуле потоков, а команда
+``warm_thumbnails`` прогревает уже загруженные картинки в нескольких
+процессах. Тег ``{% thumbnail %}`` в шаблонах находит готовый файл
+в хранилище ключей sorl и не ресайзит картинку во время запроса.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+storage = Post._meta.get_field('image').storage
+_executor = None
+
+
+def source(name):
+    """Исходник для sorl: ключ миниатюр - имя файла и хранилище."""
+    return ImageFile(name, storage)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate(name):
+    """Строит миниатюры картинки; возвращает число построенных."""
+    if not name or not storage.exists(name):
+        return 0
+    for geometry, options in settings.THUMBNAIL_PRESETS:
+        get_thumbnail(source(name), geometry, **options)
+    return len(settings.THUMBNAIL_PRESETS)
+
+
+def _generate_in_background(name):
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Не удалось построить миниатюры %s', name)
+    finally:
+        connections.close_all()
+
+
+def schedule(post):
+    """Ставит нарезку миниатюр поста в очередь после коммита."""
+    if not settings.THUMBNAIL_PREGENERATE or not post.image:
+        return
+    name = post.image.name
+    transaction.on_commit(
+        lambda: _get_executor().submit(_generate_in_background, name))
@@ -0,0 +1,107 @@
+"""Популярные посты: рейтинг с экспоненциальным затуханием.
+
+Вклад события (публикация, комментарий) убывает вдвое за
+``TRENDING_HALF_LIFE``. Так как все посты затухают одинаково, вместо
+текущего значения ``Σ w·exp(-λ(now - t))`` хранится его логарифм
+с отсчётом от общей эпохи: ``ln Σ w·exp(λ(t - EPOCH))``. Порядок постов
+по нему тот же, значение не нужно пересчитывать со временем, а новое
+событие добавляется одной операцией ``logaddexp``. Поэтому топ - это
+``ORDER BY hot_score DESC LIMIT N`` по индексу.
+"""
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+EPOCH = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def decay_rate():
+    return math.log(2) / settings.TRENDING_HALF_LIFE.total_seconds()
+
+
+def log_weight(weight, moment):
+    """Логарифм вклада события весом ``weight`` в момент ``moment``."""
+    return math.log(weight) + decay_rate() * (moment - EPOCH).total_seconds()
+
+
+def logaddexp(first, second):
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def initial_score(pub_date, followers_count):
+    """Рейтинг нового поста: чем больше подписчиков, тем выше старт."""
+    weight = (
+        settings.TRENDING_POST_WEIGHT
+        + settings.TRENDING_FOLLOWER_WEIGHT * math.log1p(followers_count))
+    return log_weight(weight, pub_date)
+
+
+def with_comment(score, created):
+    return logaddexp(
+        score, log_weight(settings.TRENDING_COMMENT_WEIGHT, created))
+
+
+def score_post(post):
+    from .models import Post, UserCounter
+
+    followers = UserCounter.objects.filter(
+        user_id=post.author_id).values_list('followers_count', flat=True)
+    post.hot_score = initial_score(post.pub_date, sum(followers))
+    Post.objects.filter(pk=post.pk).update(hot_score=post.hot_score)
+
+
+def record_comment(comment):
+    """Поднимает рейтинг поста на вклад нового комментария."""
+    from .models import Post
+
+    with transaction.atomic():
+        score = (
+            Post.objects.select_for_update().filter(pk=comment.post_id)
+            .values_list('hot_score', flat=True).first()
+        )
+        if score is None:
+            return
+        Post.objects.filter(pk=comment.post_id).update(
+            hot_score=with_comment(score, comment.created))
+
+
+def top(queryset=None):
+    """Самые популярные посты, не больше ``TRENDING_SIZE``."""
+    from .models import Post
+
+    if queryset is None:
+        queryset = Post.objects.all()
+    return queryset.order_by('-hot_score', '-pk')[:settings.TRENDING_SIZE]
+
+
+def compute_scores(posts, comments):
+    """Пары ``(pk, рейтинг)`` для всех постов по их комментариям."""
+    created_by_post = {}
+    for post_id, created in comments.values_list(
+            'post_id', 'created').iterator():
+        created_by_post.setdefault(post_id, []).append(created)
+    rows = posts.values_list(
+        'pk', 'pub_date', 'author__counters__followers_count')
+    for pk, pub_date, followers in rows.iterator():
+        score = initial_score(pub_date, followers or 0)
+        for created in created_by_post.get(pk, ()):
+            score = with_comment(score, created)
+        yield pk, score
+
+
+def rebuild():
+    """Пересчитывает рейтинг всех постов с нуля.
+
+    Удалённые комментарии при обычной работе рейтинг не уменьшают,
+    их вклад убирает только пересчёт.
+    """
+    from .models import Comment, Post
+
+    # Сначала всё посчитать: SQLite не изолирует чтение курсора от UPDATE
+    scores = list(compute_scores(Post.objects.all(), Comment.objects.all()))
+    for pk, score in scores:
+        Post.objects.filter(pk=pk).update(hot_score=score)
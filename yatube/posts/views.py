@@ -1,13 +1,18 @@
 from datetime import datetime
 
+from core import concurrency
+from core.cache import cache_page_by_generation, generation_etag
+from core.paginator import (CachedCountPaginator, CursorPaginator,
+                            elided_page_range, encode_cursor, fetch_page)
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.http import condition
 
+from . import feed, loaders, search, suggestions, trending
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
 
@@ -19,27 +24,63 @@ HTML_PROFILE = 'posts/profile.html'
 HTML_DETAIL = 'posts/post_detail.html'
 HTML_EDIT_CREATE = 'posts/create_post.html'
 HTML_FOLLOW = 'posts/follow.html'
-
-
-def func_paginator(request, post_list):
-    paginator = Paginator(post_list, settings.NUMBER_ENTRIES_FOR_PAGE)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
-
-
+HTML_TRENDING = 'posts/trending.html'
+
+
+def func_paginator(request, post_list, keyset=True, loader=None,
+                   scopes=None):
+    """Страница списка постов.
+
+    При ``keyset=True`` (список упорядочен по ``-pub_date``) переход
+    к следующей странице идёт по курсору ``?cursor=`` без COUNT и OFFSET;
+    номера страниц ``?page=`` работают как раньше. Вместо True можно
+    передать пару полей ``(дата, id)``, по которым упорядочен список.
+
+    Из БД выбираются только ключи страницы, посты с авторами и группами
+    берутся пачкой из кэша загрузчиком ``loader`` (см. posts.loaders).
+    С ``scopes`` число записей для номеров страниц берётся из кэша,
+    пока не сменились поколения этих областей (см. core.cache).
+    """
+    post_list = post_list.select_related(None)
+    if post_list.model is Post:
+        post_list = post_list.only('pk', 'pub_date')
+    cursor = request.GET.get('cursor')
+    if keyset and cursor:
+        paginator = CursorPaginator(
+            post_list, settings.NUMBER_ENTRIES_FOR_PAGE,
+            lookups=None if keyset is True else keyset)
+        page_obj = paginator.get_page(cursor)
+    else:
+        if scopes:
+            paginator = CachedCountPaginator(
+                post_list, settings.NUMBER_ENTRIES_FOR_PAGE, scopes)
+        else:
+            paginator = Paginator(
+                post_list, settings.NUMBER_ENTRIES_FOR_PAGE)
+        page_obj = fetch_page(paginator, request.GET.get('page'))
+        page_obj.elided_page_range = list(elided_page_range(
+            page_obj.number, paginator.num_pages,
+            on_each_side=settings.PAGINATOR_ON_EACH_SIDE))
+        if keyset and page_obj.has_next():
+            lookups = ('pub_date', 'pk') if keyset is True else keyset
+            last = page_obj[-1]
+            page_obj.next_cursor = encode_cursor(
+                [getattr(last, lookup) for lookup in lookups])
+    return loaders.load_page(page_obj, loader or loaders.posts)
+
+
+@condition(etag_func=generation_etag(lambda request: ('posts', 'meta')))
+@cache_page_by_generation(lambda: ('posts', 'meta'))
 def index(request):
     template = HTML_INDEX
-    post_list = Post.objects.select_related('author')
+    post_list = Post.objects.all()
 
     query = request.GET.get('q')
     date_of = request.GET.get('date_of')
     date_to = request.GET.get('date_to')
 
     if query:
-        post_list = post_list.filter(
-            Q(text__icontains=query)
-            | Q(author__username__icontains=query)
-        )
+        post_list = search.search_posts(post_list, query)
 
     if date_of and date_to:
         date_of_obj, date_to_obj = [
@@ -52,15 +93,22 @@ def index(request):
     if date_of and not date_to:
         post_list = post_list.filter(pub_date__date=date_of)
 
+    # Результаты поиска без явной сортировки идут по релевантности
+    ranked = bool(query) and 'sort' not in request.GET
     sort = request.GET.get('sort', 'pub_date')
     direction = request.GET.get('direction', 'desc')
     if direction == 'desc':
         order = '-' + sort
     else:
         order = sort
-    post_list = post_list.order_by(order)
-
-    page_obj = func_paginator(request, post_list)
+    if not ranked:
+        post_list = post_list.order_by(order)
+
+    # В списке выводится анонс, полный текст поста не нужен
+    page_obj = func_paginator(
+        request, post_list,
+        keyset=(not ranked and sort == 'pub_date' and direction == 'desc'),
+        loader=loaders.post_summaries, scopes=('posts',))
     context = {
         'page_obj': page_obj,
         'query': query,
@@ -72,47 +120,116 @@ def index(request):
     return render(request, template, context)
 
 
+@condition(etag_func=generation_etag(lambda request: ('trending', 'meta')))
+@cache_page_by_generation(lambda: ('trending', 'meta'))
+def trending_posts(request):
+    post_list = trending.top(Post.objects.all())
+    page_obj = func_paginator(request, post_list, keyset=False)
+    return render(request, HTML_TRENDING, {'page_obj': page_obj})
+
+
+@condition(etag_func=generation_etag(
+    lambda request, slug: (f'group:{slug}', 'meta')))
+@cache_page_by_generation(lambda slug: (f'group:{slug}', 'meta'))
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
     template = HTML_GROUP_LIST
-    post_list = group.posts.all()
-    page_obj = func_paginator(request, post_list)
+    post_list = Post.objects.filter(group__slug=slug)
+    found = concurrency.fetch(
+        group=lambda: get_object_or_404(Group, slug=slug),
+        page_obj=lambda: func_paginator(
+            request, post_list, scopes=(f'group:{slug}',)),
+    )
     context = {
-        'page_obj': page_obj,
-        'group': group,
+        'page_obj': found['page_obj'],
+        'group': found['group'],
     }
     return render(request, template, context)
 
 
+def profile_scopes(request, username):
+    scopes = [f'author:{username}', 'meta']
+    if request.user.is_authenticated:
+        # Рекомендации видны только вошедшему; анонимному ETag ставит
+        # кэш страниц по тем же областям
+        scopes.append(f'suggestions:{request.user.pk}')
+    return scopes
+
+
+@condition(etag_func=generation_etag(profile_scopes))
+@cache_page_by_generation(lambda username: (f'author:{username}', 'meta'))
 def profile(request, username):
     template = HTML_PROFILE
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('author', 'group')
-    page_obj = func_paginator(request, post_list)
-    following = Follow.objects.filter(
-        user__username=request.user,
-        author=author).exists()
+    post_list = Post.objects.filter(author__username=username)
+    # Части страницы не зависят друг от друга и читаются одновременно
+    found = concurrency.fetch(
+        author=lambda: get_object_or_404(
+            User.objects.select_related('counters'), username=username),
+        page_obj=lambda: func_paginator(
+            request, post_list, scopes=(f'author:{username}',)),
+        following=lambda: Follow.objects.filter(
+            user__username=request.user,
+            author__username=username).exists(),
+        suggestions=lambda: (
+            suggestions.for_user(request.user)
+            if request.user.is_authenticated else []),
+    )
     context = {
-        'author': author,
-        'page_obj': page_obj,
-        'following': following,
+        'author': found['author'],
+        'page_obj': found['page_obj'],
+        'following': found['following'],
+        'suggestions': found['suggestions'],
     }
     return render(request, template, context)
 
 
+def comments_page(request, post_id):
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        settings.NUMBER_COMMENTS_FOR_PAGE,
+        field='created',
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+@condition(etag_func=generation_etag(
+    lambda request, post_id: ('posts', f'comments:{post_id}', 'meta')))
 def post_detail(request, post_id):
     template = HTML_DETAIL
-    post_obj = get_object_or_404(Post, pk=post_id)
+    found = concurrency.fetch(
+        post=lambda: get_object_or_404(
+            Post.objects.select_related('author__counters', 'group'),
+            pk=post_id),
+        comments=lambda: comments_page(request, post_id),
+    )
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.all()
     context = {
-        'post': post_obj,
+        'post': found['post'],
         'form': form,
-        'comments': comments,
+        'comments': found['comments'],
     }
     return render(request, template, context)
 
 
+def comment_list(request, post_id):
+    """Очередная порция комментариев поста в JSON для подгрузки."""
+    get_object_or_404(Post, pk=post_id)
+    page = comments_page(request, post_id)
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'author_url': reverse(
+                    PROFILE, args=(comment.author.username,)),
+                'text': comment.text,
+                'created': comment.created,
+            }
+            for comment in page
+        ],
+        'next_cursor': page.next_cursor,
+    })
+
+
 @login_required
 def post_create(request):
     template = HTML_EDIT_CREATE
@@ -166,10 +283,14 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=generation_etag(
+    lambda request: ('posts', f'follows:{request.user.pk}', 'meta')))
 def follow_index(request):
     template = HTML_FOLLOW
-    author_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = func_paginator(request, author_list)
+    post_list, lookups = feed.feed_for(request.user)
+    page_obj = func_paginator(
+        request, post_list, keyset=lookups,
+        scopes=('posts', f'follows:{request.user.pk}'))
     context = {
         'page_obj': page_obj,
     }
@@ -0,0 +1,45 @@
+"""
+ASGI config for yatube project.
+
+Django 2.2 не умеет ASGI, поэтому обычные страницы выполняются как WSGI
+в пуле потоков (asgiref.wsgi.WsgiToAsgi), а поток новых постов
+``/events/`` обслуживается асинхронно и держит соединения без потоков.
+
+Запуск: uvicorn yatube.asgi:application
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from asgiref.wsgi import WsgiToAsgi  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+from core.events import sse_app  # noqa: E402
+from posts.events import resolve_channels  # noqa: E402
+
+EVENTS_PATH = '/events/'
+
+django_application = WsgiToAsgi(get_wsgi_application())
+events_application = sse_app(resolve_channels)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        return await events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+from datetime import timedelta
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -43,16 +44,126 @@ ALLOWED_HOSTS = [
     'testserver',
 ]
 
+# Кэш в SQLite общий для всех воркеров на хосте (core.sqlite_cache):
+# сброс поколения в одном процессе виден остальным
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.sqlite_cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_EVERY': 100},
     }
 }
+# Тесты получают свой файл кэша во временном каталоге (core.testing)
+TEST_RUNNER = 'core.testing.TestRunner'
+
+# Страницы сбрасываются по поколениям, TTL только вытесняет старые ключи
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Как часто процесс переносит попадания и промахи страниц в кэш, секунды
+PAGE_CACHE_STATS_INTERVAL = 10
+# Защита от одновременного пересчёта (core.cache.get_or_compute):
+# сколько секунд после срока отдавать прежнее значение, пока его
+# пересчитывает другой запрос; на сколько берётся блокировка пересчёта;
+# сколько ждать значение, которого в кэше ещё нет; насколько рано
+# начинать пересчёт (0 - не раньше срока)
+CACHE_STALE_TIMEOUT = 60
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 5
+CACHE_EARLY_BETA = 1.0
+# Число постов в списках для номеров страниц
+COUNT_CACHE_TIMEOUT = 60 * 5
+# Карточки постов сбрасываются по дате изменения поста
+POST_CARD_TIMEOUT = 60 * 60 * 24
+# Объекты загрузчиков списков (core.loader) сбрасываются сигналами
+LOADER_TIMEOUT = 60 * 60
+
+# Размеры миниатюр из шаблонов ({% thumbnail post.image ... %}), которые
+# строятся заранее после сохранения поста и командой warm_thumbnails
+THUMBNAIL_PRESETS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+THUMBNAIL_PREGENERATE = True
+THUMBNAIL_WORKERS = 2
+# Загрузчики файлов считают SHA-256 по мере приёма для хранилища
+# картинок по содержимому (core.storage)
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.DigestMemoryFileUploadHandler',
+    'core.uploads.DigestTemporaryFileUploadHandler',
+]
+# Предельный размер загружаемой картинки, байт
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+# Предельное число пикселей картинки; проверяется по заголовку файла
+UPLOAD_MAX_PIXELS = 40_000_000
+# Перекодировать новые картинки без метаданных в отдельных процессах
+IMAGE_CLEANUP = True
+IMAGE_CLEANUP_PROCESSES = 2
 
 EMPTY_VALUE_DISPLAY = '-пусто-'
 
 NUMBER_ENTRIES_FOR_PAGE = 10
 
+# Сколько номеров страниц показывать по обе стороны от текущей
+PAGINATOR_ON_EACH_SIDE = 2
+
+NUMBER_COMMENTS_FOR_PAGE = 50
+
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+# Популярные посты: вклад публикации и комментария вдвое меньше через
+# TRENDING_HALF_LIFE; подписчики автора добавляют вес публикации
+TRENDING_HALF_LIFE = timedelta(hours=12)
+TRENDING_POST_WEIGHT = 1.0
+TRENDING_FOLLOWER_WEIGHT = 0.5
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_SIZE = 50
+
+# Рекомендации авторов (posts.suggestions, команда recompute_suggestions)
+SUGGESTIONS_LIMIT = 5
+SUGGESTIONS_FOF_WEIGHT = 1.0
+SUGGESTIONS_COFOLLOW_WEIGHT = 3.0
+# Сколько последних читателей автора учитывать в совместных подписках
+SUGGESTIONS_COFOLLOW_SAMPLE = 100
+SUGGESTIONS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Поток новых постов (core.events, путь /events/ в yatube/asgi.py):
+# размер очереди клиента, интервал пинга в секундах, пауза перед
+# переподключением браузера в миллисекундах
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT = 15
+EVENTS_RETRY_MS = 5000
+
+# Одновременное чтение частей страницы в пуле потоков (core.concurrency).
+# Имеет смысл на сетевой СУБД, для файла SQLite не включать
+CONCURRENT_READS = False
+CONCURRENT_READS_WORKERS = 8
+
+# Бюджет SQL-запросов на страницу (core.middleware.QueryBudgetMiddleware)
+# и сколько раз один и тот же запрос может повториться, прежде чем это N+1
+QUERY_BUDGET_DEFAULT = 15
+# Бюджеты списков - для холодного кэша загрузчиков: посты, авторы
+# и группы страницы читаются тремя in_bulk, с тёплым - ни одним
+QUERY_BUDGETS = {
+    'posts:index': 8,
+    'posts:group_list': 8,
+    'posts:profile': 10,
+    'posts:post_detail': 6,
+    'posts:follow_index': 8,
+    'posts:profile_unfollow': 12,
+}
+QUERY_REPEAT_LIMIT = 3
+QUERY_BUDGET_RAISE = False
+# Заголовки X-DB-Queries и X-DB-Time в ответах не только при DEBUG
+QUERY_BUDGET_HEADERS = False
+
+# Авторы с таким числом подписчиков не раскладываются по лентам; снова
+# раскладываются, только опустившись ниже FEED_FANOUT_RESUME_LIMIT,
+# и тогда в ленты подписчиков в фоне добавляются FEED_BACKFILL_POSTS
+# последних постов автора
+FEED_FANOUT_LIMIT = 1000
+FEED_FANOUT_RESUME_LIMIT = 900
+FEED_BACKFILL_POSTS = 100
+FEED_BACKFILL_WORKERS = 1
+
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 INTERNAL_IPS = [
@@ -64,6 +175,7 @@ INTERNAL_IPS = [
 INSTALLED_APPS = [
     'debug_toolbar',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
@@ -77,6 +189,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',